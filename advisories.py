@@ -0,0 +1,62 @@
+from crop_search import CropIndex
+
+# Daily water need of major Tamil Nadu crops (L/m² per day), as used by the
+# irrigation planner in naina.py
+DEFAULT_CROP_WATER = {
+    "paddy": 12, "sugarcane": 15, "banana": 10, "coconut": 8, "cotton": 7, "ragi": 4,
+    "groundnut": 5, "tomato": 6, "brinjal": 7, "turmeric": 8,
+}
+water_crops = CropIndex(list(DEFAULT_CROP_WATER))
+
+TAMIL_CROP_NAMES = {
+    "paddy": "நெல்", "sugarcane": "கரும்பு", "banana": "வாழை", "coconut": "தென்னை", "cotton": "பருத்தி",
+    "ragi": "கேழ்வரகு", "groundnut": "நிலக்கடலை", "tomato": "தக்காளி", "brinjal": "கத்தரி", "turmeric": "மஞ்சள்",
+}
+
+advice = {
+    "en": {
+        "disease": "To identify a crop disease, upload a clear photo of the affected leaf for diagnosis. "
+                   "Meanwhile, remove badly affected leaves, avoid overhead watering, and contact your nearest "
+                   "agricultural extension office before spraying chemicals.",
+        "scheme": "Main schemes for Tamil Nadu farmers: PM-KISAN (₹6,000 a year income support), "
+                  "PMFBY crop insurance, Kisan Credit Card loans, PM-KUSUM solar pumps, and the state "
+                  "micro-irrigation subsidy for drip and sprinkler systems. Apply at your nearest "
+                  "agriculture office or e-Sevai centre.",
+        "irrigation": "{crop} needs about {litres} L/m² of water per day. Drip irrigation saves up to 40% "
+                      "of this; reduce watering after rain.",
+        "irrigation_general": "Water early in the morning or in the evening, prefer drip or sprinkler "
+                              "systems, and skip irrigation after good rainfall. Tell me your crop for a "
+                              "daily water estimate.",
+    },
+    "ta": {
+        "disease": "பயிர் நோயைக் கண்டறிய, பாதிக்கப்பட்ட இலையின் தெளிவான புகைப்படத்தைப் பதிவேற்றவும். "
+                   "அதுவரை, அதிகம் பாதிக்கப்பட்ட இலைகளை அகற்றி, மேலிருந்து நீர் ஊற்றுவதைத் தவிர்த்து, "
+                   "மருந்து தெளிக்கும் முன் அருகிலுள்ள வேளாண் விரிவாக்க அலுவலகத்தை அணுகவும்.",
+        "scheme": "தமிழ்நாடு விவசாயிகளுக்கான முக்கிய திட்டங்கள்: பிஎம்-கிசான் (ஆண்டுக்கு ₹6,000), "
+                  "பிஎம்எஃப்பிஒய் பயிர் காப்பீடு, கிசான் கிரெடிட் கார்டு கடன், பிஎம்-குசும் சோலார் பம்ப், "
+                  "சொட்டு மற்றும் தெளிப்பு நீர்ப்பாசன மானியம். அருகிலுள்ள வேளாண் அலுவலகம் அல்லது இ-சேவை "
+                  "மையத்தில் விண்ணப்பிக்கவும்.",
+        "irrigation": "{crop} பயிருக்கு நாளொன்றுக்கு சுமார் {litres} லி/மீ² தண்ணீர் தேவை. சொட்டு நீர்ப்பாசனம் "
+                      "40% வரை நீரைச் சேமிக்கும்; மழைக்குப் பின் நீர் குறைக்கவும்.",
+        "irrigation_general": "அதிகாலை அல்லது மாலையில் நீர் பாய்ச்சவும், சொட்டு அல்லது தெளிப்பு முறையைப் "
+                              "பயன்படுத்தவும், நல்ல மழைக்குப் பின் பாசனத்தைத் தவிர்க்கவும். தினசரி நீர் "
+                              "அளவுக்கு உங்கள் பயிரின் பெயரைச் சொல்லுங்கள்.",
+    },
+}
+
+
+def disease_advice(lang):
+    return advice[lang]["disease"]
+
+
+def scheme_advice(lang):
+    return advice[lang]["scheme"]
+
+
+def irrigation_advice(message, lang):
+    matches = water_crops.search(message, limit=1)
+    if not matches:
+        return advice[lang]["irrigation_general"]
+    crop = matches[0][0]
+    name = TAMIL_CROP_NAMES[crop] if lang == "ta" else crop.title()
+    return advice[lang]["irrigation"].format(crop=name, litres=DEFAULT_CROP_WATER[crop])
@@ -1,103 +1,799 @@
-from flask import Flask, request, jsonify
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-import requests
+from flask_sock import Sock
 import ollama
 
+from http_client import http
+from metrics import histogram, histogram_summaries, prometheus_text, server_timing, span, start_request_spans
+from geocache import geocache_from_env
+from offline_geocoder import offline_geocoder_from_env
+from weather_cache import weather_cache_from_env
+from market_index import market_ingester_from_env
+from response_cache import response_cache_from_env
+from semantic_cache import semantic_cache_from_env
+from singleflight import SingleFlight, StreamFlight, process_flight_from_env
+from scheduler import SchedulerBusy, scheduler_from_env
+from intent_router import intent_router_from_env
+from advisories import disease_advice, irrigation_advice, scheme_advice
+from model_router import model_router_from_env
+from textnorm import normalize_prompt
+from session_store import session_store_from_env
+from faq import faq_engine_from_env
+
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
+# Model tier decisions and per-generation latency are logged at INFO
+app.logger.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
+sock = Sock(app)
+
+# Upstream endpoints can be pointed at local stand-ins (see stub_upstreams.py)
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+WTTR_URL = os.environ.get("WTTR_URL", "https://wttr.in")
+AGMARKNET_URL = os.environ.get("AGMARKNET_URL", "https://agmarknet.gov.in/")
+LLM_MODEL = os.environ.get("LLM_MODEL", "mistral")  # default when no LLM_MODEL_TIERS are set
+# Nominatim is only asked when the offline gazetteer has no nearby place
+NOMINATIM_FALLBACK = os.environ.get("NOMINATIM_FALLBACK", "1") == "1"
+# Adds a Server-Timing header (geocode, weather, market, ollama) to responses
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
+
+# /chat/batch: largest accepted batch, and how many of its calls may run at
+# once per stage across all batches, so one bulk job cannot take every Ollama
+# slot or flood Nominatim and wttr.in
+BATCH_MAX_MESSAGES = int(os.environ.get("BATCH_MAX_MESSAGES", 500))
+BATCH_LIMITS = {
+    "geocode": threading.BoundedSemaphore(int(os.environ.get("BATCH_GEOCODE_CONCURRENCY", 4))),
+    "weather": threading.BoundedSemaphore(int(os.environ.get("BATCH_WEATHER_CONCURRENCY", 8))),
+    "llm": threading.BoundedSemaphore(int(os.environ.get("BATCH_LLM_CONCURRENCY", 2))),
+}
+
+# Per-upstream deadlines (seconds) for the /chat pipeline
+DEADLINES = {
+    "geocode": float(os.environ.get("GEOCODE_DEADLINE", 5)),
+    "weather": float(os.environ.get("WEATHER_DEADLINE", 5)),
+    "llm": float(os.environ.get("LLM_DEADLINE", 120)),
+}
 
 translations = {
     "en": {
         "error": "Please enter a message.",
         "switch": "Switch to Tamil",
         "fallback": "I can help with farming! Ask me about weather, market prices, crop advice, or government schemes.",
-        "market_prefix": "Market price for"
+        "market_prefix": "Market price for",
+        "timeout": "The service is taking too long to respond. Please try again.",
+        "busy": "Many farmers are asking questions right now. Please try again in a minute.",
+        "weather_unavailable": "Weather information is unavailable right now. Please try again shortly."
     },
     "ta": {
         "error": "தயவுசெய்து ஒரு செய்தியை உள்ளிடவும்.",
         "switch": "ஆங்கிலத்திற்கு மாற்று",
         "fallback": "நான் விவசாயத்துக்கு உதவலாம்! வானிலை, சந்தை விலை, பயிர் அறிவுரை அல்லது அரசு திட்டங்களைப் பற்றி என்னிடம் கேளுங்கள்.",
-        "market_prefix": "சந்தை விலை"
+        "market_prefix": "சந்தை விலை",
+        "timeout": "சேவை பதிலளிக்க அதிக நேரம் எடுக்கிறது. மீண்டும் முயற்சிக்கவும்.",
+        "busy": "இப்போது பல விவசாயிகள் கேள்வி கேட்கிறார்கள். ஒரு நிமிடம் கழித்து மீண்டும் முயற்சிக்கவும்.",
+        "weather_unavailable": "வானிலை தகவல் இப்போது கிடைக்கவில்லை. சிறிது நேரம் கழித்து மீண்டும் முயற்சிக்கவும்."
     }
 }
 
+offline_geocoder = offline_geocoder_from_env()
+location_cache = geocache_from_env()
+
+@span("geocode")
 def get_location_info(lat, lon):
+    # Coordinates come straight from the client, so anything that is not a
+    # number is treated like a place nobody could find
     try:
-        response = requests.get(f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lon}")
+        place = offline_geocoder.lookup(float(lat), float(lon))
+    except (TypeError, ValueError):
+        return "Unknown location"
+    if place is not None:
+        return place
+    place = location_cache.get(lat, lon)
+    if place is not None:
+        return place
+    if not NOMINATIM_FALLBACK:
+        return "Unknown location"
+    try:
+        response = http.get("nominatim", f"{NOMINATIM_URL}/reverse?format=json&lat={lat}&lon={lon}")
         data = response.json()
-        return data.get("display_name", "Unknown location")
+        place = data.get("display_name", "Unknown location")
     except Exception:
         return "Unknown location"
+    if place != "Unknown location":
+        location_cache.set(lat, lon, place)
+    return place
+
+def fetch_weather(lat, lon, lang):
+    response = http.get("wttr", f"{WTTR_URL}/{lat},{lon}?format=%C+%t&lang={lang}")
+    response.raise_for_status()
+    return response.text.strip()
+
+weather_cache = weather_cache_from_env(fetch_weather)
 
+@span("weather")
 def get_weather(lat, lon, lang):
+    # Fresh, stale or expired cached report first; when wttr.in is failing
+    # (or its circuit is open) a short "unavailable" reply instead of waiting
     try:
-        response = requests.get(f"https://wttr.in/{lat},{lon}?format=%C+%t&lang={lang}")
-        return response.text.strip()
+        return weather_cache.get(lat, lon, lang)
     except Exception:
-        return translations[lang]["error"]
+        return translations[lang]["weather_unavailable"]
 
-import requests
-from bs4 import BeautifulSoup
 
+def fetch_market_html():
+    response = http.get("agmarknet", AGMARKNET_URL, headers={"User-Agent": "Mozilla/5.0"})
+    response.raise_for_status()
+    return response.text
 
-def get_market_price(crop, lang="en"):
-    url = "https://agmarknet.gov.in/"
-    headers = {"User-Agent": "Mozilla/5.0"}
+# Prices are ingested in the background; /chat only reads the latest snapshot
+market_ingester = market_ingester_from_env(fetch_market_html).start()
 
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        return "மார்க்கெட் விலை தகவலை பெற முடியவில்லை." if lang == "ta" else "Error fetching market price data."
+@span("market")
+def get_market_price(query, lang="en"):
+    snapshot = market_ingester.snapshot
+    if not snapshot:
+        return "விலை தரவுகள் கிடைக்கவில்லை." if lang == "ta" else "Market price data not found."
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    match = snapshot.lookup(query)
+    if match is None:
+        return "தேர்ந்தெடுத்த பயிருக்கு விலை தரவுகள் கிடைக்கவில்லை." if lang == "ta" else "No price data available for the selected crop."
 
-    # Locate the table containing market prices (Ensure this matches actual structure)
-    table = soup.find("table")  # Adjust if necessary
-    if not table:
-        return "விலை தரவுகள் கிடைக்கவில்லை." if lang == "ta" else "Market price data not found."
+    commodity, mandi, price = match
+    name = f"{commodity} ({mandi})" if mandi else commodity
+    return f"{name}: ₹{price}" if lang == "en" else f"{name} : ₹{price} (தமிழ்)"
 
-    crop = crop.lower()  # Convert input to lowercase for case-insensitive search
 
-    # Loop through table rows
-    for row in table.find_all("tr")[1:]:  # Skip header row
-        columns = row.find_all("td")
-        if len(columns) > 1 and crop in columns[0].text.lower():
-            price = columns[1].text.strip()
-            return f"{columns[0].text}: ₹{price}" if lang == "en" else f"{columns[0].text} : ₹{price} (தமிழ்)"
+# Side lookups (e.g. reverse geocoding) that overlap a streamed generation
+background = ThreadPoolExecutor(max_workers=32, thread_name_prefix="chat-background")
 
-    return "தேர்ந்தெடுத்த பயிருக்கு விலை தரவுகள் கிடைக்கவில்லை." if lang == "ta" else "No price data available for the selected crop."
+response_cache = response_cache_from_env()
+semantic_cache = semantic_cache_from_env()
 
+def cached_reply(user_message, lang, model):
+    # Exact repeats first, then paraphrases of earlier questions. Returns
+    # (reply or None, prompt embedding or None); a miss's embedding goes on
+    # to remember_reply so the prompt is embedded only once.
+    cached = response_cache.get(user_message, lang, model)
+    vector = None
+    if cached is None and semantic_cache is not None:
+        match, vector = semantic_cache.get(user_message, lang, model)
+        if match is not None:
+            cached = match[0]
+    return cached, vector
 
+def remember_reply(user_message, lang, model, bot_reply, vector=None):
+    response_cache.set(user_message, lang, model, bot_reply)
+    if semantic_cache is not None:
+        semantic_cache.add(user_message, lang, model, bot_reply, vector)
 
-@app.route("/chat", methods=["POST"])
-def chat():
+# Identical prompts that arrive while a generation is running share it, both
+# within this process and (through a lock file) across gunicorn workers
+llm_flight = SingleFlight()
+process_flight = process_flight_from_env(timeout=DEADLINES["llm"])
+# Bounds concurrent Ollama generations; cached answers never reach it
+scheduler = scheduler_from_env()
+# Streamed generations are pumped on their own threads, one per running or
+# queued generation, so every pump reaches the scheduler at once (its queue
+# and busy replies stay accurate) and none waits behind, or delays, the side
+# lookups on `background`
+stream_pool = ThreadPoolExecutor(max_workers=scheduler.concurrency + scheduler.max_queue,
+                                 thread_name_prefix="chat-stream")
+stream_flight = StreamFlight(stream_pool)
+# Short, simple prompts can go to a smaller model than long ones
+model_router = model_router_from_env(LLM_MODEL, app.logger)
+
+def record_generation(tier, seconds):
+    histogram("llm_generation_seconds", tier=tier.name).record(seconds)
+    app.logger.info("generation tier=%s model=%s seconds=%.3f", tier.name, tier.model, seconds)
+
+
+def generate_reply(user_message, lang, tier, vector=None):
+    with scheduler.slot(user_message):
+        started = time.perf_counter()
+        with span("ollama"):
+            response = ollama.chat(model=tier.model, messages=[{"role": "user", "content": user_message}])
+        record_generation(tier, time.perf_counter() - started)
+    bot_reply = response["message"]["content"]
+    remember_reply(user_message, lang, tier.model, bot_reply, vector)
+    return bot_reply
+
+def ask_llm(user_message, lang):
+    tier = model_router.choose(user_message)
+    cached, vector = cached_reply(user_message, lang, tier.model)
+    if cached is not None:
+        return cached
+
+    key = response_cache.key(user_message, lang, tier.model)
+    if process_flight is None:
+        return llm_flight.do(key, lambda: generate_reply(user_message, lang, tier, vector))
+    return llm_flight.do(key, lambda: process_flight.do(
+        key,
+        lambda: response_cache.get(user_message, lang, tier.model),
+        lambda: generate_reply(user_message, lang, tier, vector),
+    ))
+
+
+# Worker threads for /chat's blocking upstream calls. Not the event loop's
+# default executor: Flask runs each async view in its own loop and closing
+# it waits for that executor's threads, so a stalled upstream would hold the
+# response past its deadline. Here an abandoned call just finishes unobserved.
+upstream_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("CHAT_UPSTREAM_WORKERS", 64)),
+                                   thread_name_prefix="chat-upstream")
+
+
+async def run_blocking(stage, func, *args):
+    # Blocking upstream calls run on worker threads so they can overlap; each
+    # stage gets its own deadline. The context is copied (as asyncio.to_thread
+    # would) so the calls' spans reach the request.
+    call = functools.partial(contextvars.copy_context().run, func, *args)
+    return await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(upstream_pool, call), DEADLINES[stage])
+
+
+async def resolve_location(lat, lon):
+    try:
+        return await run_blocking("geocode", get_location_info, lat, lon)
+    except asyncio.TimeoutError:
+        return "Unknown location"
+
+
+def location_suffix(place, lang):
+    return f" (உங்கள் இருப்பிடம்: {place})" if lang == "ta" else f" (User's location: {place})"
+
+
+intent_router = intent_router_from_env()
+intent_counts = Counter()
+
+def route_intent(user_message, location):
+    intent, confidence, source = intent_router.route(user_message)
+    if intent == "weather" and not location:
+        intent = "chat"
+    intent_counts[f"{intent}/{source}"] += 1
+    return intent
+
+
+def market_query(user_message):
+    return user_message.replace("market price", " ").replace("சந்தை விலை", " ")
+
+
+faq = faq_engine_from_env()
+
+def answer_locally(intent, user_message, lang):
+    # Intents answered from in-memory data; None means ask the LLM. A
+    # confident FAQ match beats the generic per-intent advice.
+    if intent == "market":
+        return get_market_price(market_query(user_message), lang)
+    reply = faq.answer(user_message, lang)
+    if reply is not None:
+        return reply
+    if intent == "disease":
+        return disease_advice(lang)
+    if intent == "irrigation":
+        return irrigation_advice(user_message, lang)
+    if intent == "scheme":
+        return scheme_advice(lang)
+    return None
+
+
+async def build_reply(user_message, lang, location):
+    # Routing takes microseconds, so the upstream calls a reply needs are
+    # known up front and can all be started together.
+    intent = route_intent(user_message, location)
+    if intent == "weather":
+        try:
+            return await run_blocking("weather", get_weather, location["latitude"], location["longitude"], lang)
+        except asyncio.TimeoutError:
+            return translations[lang]["timeout"]
+
+    reply = answer_locally(intent, user_message, lang)
+    if reply is not None:
+        return reply
+
+    place_task = None
+    if location:
+        place_task = asyncio.ensure_future(resolve_location(location["latitude"], location["longitude"]))
+
+    try:
+        bot_reply = await run_blocking("llm", ask_llm, user_message, lang)
+    except asyncio.TimeoutError:
+        bot_reply = translations[lang]["timeout"]
+    except SchedulerBusy:
+        if place_task:
+            place_task.cancel()
+        raise
+    except Exception as e:
+        if place_task:
+            place_task.cancel()
+        return f"Error: {str(e)}"
+
+    if place_task:
+        return bot_reply + location_suffix(await place_task, lang)
+    return bot_reply
+
+
+def lookup_reply(user_message, lang):
+    # (tier, cached reply or None, prompt vector) for an LLM-bound message
+    tier = model_router.choose(user_message)
+    cached, vector = cached_reply(user_message, lang, tier.model)
+    return tier, cached, vector
+
+
+def starts_generation(user_message, lang, lookup):
+    # Whether streaming this message would take a scheduler slot: not when
+    # it is cached or joins a generation already running
+    tier, cached, _ = lookup
+    return cached is None and not stream_flight.in_flight(response_cache.key(user_message, lang, tier.model))
+
+
+def stream_llm(user_message, lang, lookup=None):
+    # Yields reply tokens as Ollama generates them (or the cached reply as a
+    # single token). Concurrent identical prompts read one shared generation.
+    # `lookup` is lookup_reply's result when the caller already has it.
+    tier, cached, vector = lookup or lookup_reply(user_message, lang)
+    if cached is not None:
+        yield cached
+        return
+    key = response_cache.key(user_message, lang, tier.model)
+    yield from stream_flight.stream(key, lambda: generate_tokens(user_message, lang, tier, vector))
+
+
+def generate_tokens(user_message, lang, tier, vector=None):
+    # Streams one generation from Ollama, recording time-to-first-token and
+    # tokens/sec, and caches the full reply once it completes.
+    parts = []
+    with scheduler.slot(user_message):
+        started = time.perf_counter()
+        first_token_at = None
+        with span("ollama"):
+            for chunk in ollama.chat(model=tier.model, messages=[{"role": "user", "content": user_message}], stream=True):
+                token = chunk["message"]["content"]
+                if not token:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    histogram("llm_time_to_first_token_seconds", model=tier.model).record(first_token_at - started)
+                parts.append(token)
+                yield token
+
+        record_generation(tier, time.perf_counter() - started)
+
+    if len(parts) > 1:
+        generation_seconds = time.perf_counter() - first_token_at
+        histogram("llm_tokens_per_second", model=tier.model).record((len(parts) - 1) / max(generation_seconds, 1e-6))
+    if parts:
+        remember_reply(user_message, lang, tier.model, "".join(parts), vector)
+
+
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_reply(user_message, lang, location, intent, reply=None, lookup=None):
+    # Server-Sent Events: one "token" event per generated chunk, then a
+    # "done" event carrying the complete reply (location suffix included).
+    # chat_stream has already tried the local answer (`reply`) and the
+    # caches (`lookup`) for everything but weather.
+    if intent == "weather":
+        try:
+            reply = background.submit(get_weather, location["latitude"], location["longitude"], lang).result(
+                timeout=DEADLINES["weather"])
+        except FutureTimeout:
+            reply = translations[lang]["timeout"]
+    if reply is not None:
+        yield sse_event({"token": reply})
+        yield sse_event({"response": reply}, "done")
+        return
+
+    place = None
+    if location:
+        place = background.submit(get_location_info, location["latitude"], location["longitude"])
+
+    parts = []
+    try:
+        for token in stream_llm(user_message, lang, lookup):
+            parts.append(token)
+            yield sse_event({"token": token})
+    except SchedulerBusy:
+        yield sse_event({"response": translations[lang]["busy"]}, "busy")
+        return
+    except Exception as e:
+        yield sse_event({"response": f"Error: {str(e)}"}, "error")
+        return
+
+    suffix = ""
+    if place is not None:
+        try:
+            suffix = location_suffix(place.result(timeout=DEADLINES["geocode"]), lang)
+        except Exception:
+            suffix = location_suffix("Unknown location", lang)
+        yield sse_event({"token": suffix})
+    yield sse_event({"response": "".join(parts) + suffix}, "done")
+
+
+@app.before_request
+def begin_spans():
+    g.started = time.perf_counter()
+    g.spans = start_request_spans()
+
+
+@app.after_request
+def add_server_timing(response):
+    # Streamed responses send headers before generating, so they only carry
+    # the spans that finished before the first byte.
+    if SERVER_TIMING and "spans" in g:
+        total = ("total", time.perf_counter() - g.started)
+        response.headers["Server-Timing"] = server_timing(g.spans + [total])
+        # Lets the web client read it through the Resource Timing API
+        response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+
+batch_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="chat-batch")
+LOCAL_INTENTS = ("market", "disease", "irrigation", "scheme")
+
+
+def location_key(location):
+    # ~100 m grid, so nearby farmers share one geocode lookup
+    if not location:
+        return None
+    return round(float(location["latitude"]), 3), round(float(location["longitude"]), 3)
+
+
+def limited(stage, func, *args):
+    with BATCH_LIMITS[stage]:
+        return func(*args)
+
+
+def batch_answer(intent, message, lang, location, place):
+    if intent == "weather":
+        return limited("weather", get_weather, location["latitude"], location["longitude"], lang)
+    reply = limited("llm", ask_llm, message, lang)
+    if place is None:
+        return reply
+    try:
+        name = place.result(timeout=DEADLINES["geocode"])
+    except Exception:
+        name = "Unknown location"
+    return reply + location_suffix(name, lang)
+
+
+def batch_line(indexes, items, intent, status, response):
+    return "".join(
+        json.dumps({"index": index, "id": items[index][3], "intent": intent, "status": status, "response": response},
+                   ensure_ascii=False) + "\n"
+        for index in indexes
+    )
+
+
+def batch_results(items):
+    # NDJSON, one line per message as soon as its answer is ready. Identical
+    # (prompt, language, place) messages are answered once; local intents
+    # come back first, then weather and LLM answers as their calls finish,
+    # then a summary line.
+    started = time.perf_counter()
+    groups = {}
+    for index, (message, lang, location, _) in enumerate(items):
+        if not message:
+            yield batch_line([index], items, None, "error", translations[lang]["error"])
+            continue
+        groups.setdefault((normalize_prompt(message), lang, location_key(location)), []).append(index)
+
+    by_intent = {}
+    for indexes in groups.values():
+        message, _, location, _ = items[indexes[0]]
+        by_intent.setdefault(route_intent(message, location), []).append(indexes)
+
+    for intent in LOCAL_INTENTS:
+        for indexes in by_intent.get(intent, []):
+            message, lang, _, _ = items[indexes[0]]
+            yield batch_line(indexes, items, intent, "ok", answer_locally(intent, message, lang))
+
+    places = {}
+    pending = {}
+    for intent in ("weather", "chat"):
+        for indexes in by_intent.get(intent, []):
+            message, lang, location, _ = items[indexes[0]]
+            place = None
+            if intent == "chat" and location:
+                place_key = location_key(location)
+                if place_key not in places:
+                    places[place_key] = batch_pool.submit(
+                        limited, "geocode", get_location_info, location["latitude"], location["longitude"])
+                place = places[place_key]
+            future = batch_pool.submit(batch_answer, intent, message, lang, location, place)
+            pending[future] = (intent, indexes)
+
+    for future in as_completed(pending):
+        intent, indexes = pending[future]
+        lang = items[indexes[0]][1]
+        try:
+            yield batch_line(indexes, items, intent, "ok", future.result())
+        except SchedulerBusy:
+            yield batch_line(indexes, items, intent, "busy", translations[lang]["busy"])
+        except Exception as e:
+            yield batch_line(indexes, items, intent, "error", f"Error: {str(e)}")
+
+    yield json.dumps({
+        "done": True,
+        "messages": len(items),
+        "unique": len(groups),
+        "intents": {intent: sum(len(indexes) for indexes in group) for intent, group in by_intent.items()},
+        "seconds": round(time.perf_counter() - started, 3),
+    }) + "\n"
+
+
+def valid_location(location):
+    # Missing, or {"latitude": ..., "longitude": ...} with numeric values
+    if not location:
+        return True
+    if not isinstance(location, dict):
+        return False
+    try:
+        float(location["latitude"]), float(location["longitude"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return True
+
+
+def parse_batch_request():
+    # {"messages": ["...", {"id": ..., "message": ..., "language": ..., "location": ...}],
+    #  "language": default, "location": default}
+    # Returns (items, error); every entry is checked before any is answered,
+    # and unknown languages fall back to English.
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return [], "expected a JSON object"
+    lang = data.get("language", "en")
+    location = data.get("location")
+    if not valid_location(location):
+        return [], "location must have numeric latitude and longitude"
+    messages = data.get("messages") or []
+    if not isinstance(messages, list):
+        return [], "messages must be a non-empty list"
+    items = []
+    for index, entry in enumerate(messages):
+        if isinstance(entry, str):
+            entry = {"message": entry}
+        if not isinstance(entry, dict):
+            return [], f"messages[{index}] must be a string or an object"
+        entry_location = entry.get("location", location)
+        if not valid_location(entry_location):
+            return [], f"messages[{index}].location must have numeric latitude and longitude"
+        entry_lang = entry.get("language", lang)
+        items.append((
+            str(entry.get("message", "")).strip().lower(),
+            entry_lang if isinstance(entry_lang, str) and entry_lang in translations else "en",
+            entry_location,
+            entry.get("id"),
+        ))
+    return items, None
+
+
+sessions = session_store_from_env()
+
+
+def session_place(session):
+    # Resolved once per session (and again only if the location changes)
+    if session.place is None and session.location:
+        session.place = get_location_info(session.location["latitude"], session.location["longitude"])
+    return session.place
+
+
+def session_weather(session, lang):
+    # The session's last report is reused until it is as old as the weather
+    # cache's TTL; "unavailable" replies are not kept
+    now = time.monotonic()
+    if session.weather is not None:
+        weather_lang, report, fetched_at = session.weather
+        if weather_lang == lang and now - fetched_at < weather_cache.ttl:
+            return report
+    report = get_weather(session.location["latitude"], session.location["longitude"], lang)
+    if report != translations[lang]["weather_unavailable"]:
+        session.weather = (lang, report, now)
+    return report
+
+
+def converse_tokens(session, user_message):
+    # A follow-up turn: the session history goes to Ollama with the new
+    # message, so the reply depends on context and is not cached or shared.
+    tier = model_router.choose(user_message)
+    messages = session.messages() + [{"role": "user", "content": user_message}]
+    if session_place(session):
+        messages.insert(0, {"role": "system", "content": f"The farmer is located in {session.place}."})
+    with scheduler.slot(user_message):
+        started = time.perf_counter()
+        with span("ollama"):
+            for chunk in ollama.chat(model=tier.model, messages=messages, stream=True):
+                token = chunk["message"]["content"]
+                if token:
+                    yield token
+        record_generation(tier, time.perf_counter() - started)
+
+
+def session_turn(session, user_message):
+    # Events for one WebSocket turn: tokens, then "done" (or "busy"/"error").
+    # The first LLM turn of a session goes through the shared cache like
+    # /chat/stream; later ones carry the history.
+    lang = session.lang
+    intent = route_intent(user_message, session.location)
+    if intent == "weather":
+        reply = session_weather(session, lang)
+    else:
+        reply = answer_locally(intent, user_message, lang)
+
+    if reply is not None:
+        yield {"type": "token", "token": reply}
+    else:
+        parts = []
+        tokens = converse_tokens(session, user_message) if session.history else stream_llm(user_message, lang)
+        try:
+            for token in tokens:
+                parts.append(token)
+                yield {"type": "token", "token": token}
+        except SchedulerBusy:
+            yield {"type": "busy", "response": translations[lang]["busy"]}
+            return
+        except Exception as e:
+            yield {"type": "error", "response": f"Error: {str(e)}"}
+            return
+        reply = "".join(parts)
+
+    sessions.add_turn(session, "user", user_message)
+    sessions.add_turn(session, "assistant", reply)
+    yield {"type": "done", "intent": intent, "response": reply}
+
+
+def parse_chat_request():
+    # Returns (message, language, location, error). Unknown languages fall
+    # back to English, as in parse_batch_request; a malformed location is
+    # an error, caught before a stream has started.
     data = request.json
-    user_message = data.get("message", "").strip().lower()
     lang = data.get("language", "en")
+    if not isinstance(lang, str) or lang not in translations:
+        lang = "en"
     location = data.get("location")
+    if not valid_location(location):
+        return None, lang, None, "location must have numeric latitude and longitude"
+    return data.get("message", "").strip().lower(), lang, location, None
+
+
+@app.route("/chat", methods=["POST"])
+async def chat():
+    user_message, lang, location, error = parse_chat_request()
+    if error:
+        return jsonify({"error": error}), 400
 
     if not user_message:
         return jsonify({"response": translations[lang]["error"]})
 
-    location_text = ""
-    if location:
-        lat, lon = location["latitude"], location["longitude"]
-        location_text = f" (உங்கள் இருப்பிடம்: {get_location_info(lat, lon)})" if lang == "ta" else f" (User's location: {get_location_info(lat, lon)})"
+    try:
+        return jsonify({"response": await build_reply(user_message, lang, location)})
+    except SchedulerBusy:
+        return busy_response(lang)
 
-        if "weather" in user_message.lower() or "வானிலை" in user_message:
-            weather_info = get_weather(lat, lon, lang)
-            return jsonify({"response": weather_info})
 
-    if "market price" in user_message or "சந்தை விலை" in user_message:
-        crop = user_message.split()[-1]  # Assume crop is the last word
-        market_info = get_market_price(crop)
-        return jsonify({"response": market_info})
+def busy_response(lang):
+    return jsonify({"response": translations[lang]["busy"]}), 429, {"Retry-After": "30"}
 
-    try:
-        response = ollama.chat(model="mistral", messages=[{"role": "user", "content": user_message}])
-        bot_reply = response["message"]["content"]
-        return jsonify({"response": bot_reply + location_text})
-    except Exception as e:
-        return jsonify({"response": f"Error: {str(e)}"})
+
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    user_message, lang, location, error = parse_chat_request()
+    if error:
+        return jsonify({"error": error}), 400
+
+    if not user_message:
+        return Response(sse_event({"response": translations[lang]["error"]}, "done"), mimetype="text/event-stream")
+    intent = route_intent(user_message, location)
+    reply = lookup = None
+    if intent != "weather":
+        reply = answer_locally(intent, user_message, lang)
+        if reply is None:
+            lookup = lookup_reply(user_message, lang)
+            # Turned away up front only when a new generation would have to
+            # wait for the scheduler; local, cached and joined answers never do
+            if scheduler.saturated() and starts_generation(user_message, lang, lookup):
+                return busy_response(lang)
+
+    return Response(
+        stream_with_context(stream_reply(user_message, lang, location, intent, reply, lookup)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@sock.route("/chat/ws")
+def chat_ws(ws):
+    # JSON frames. Client: {"type": "hello", "session", "language", "location"}
+    # once per connection (session resumes an earlier one), then
+    # {"type": "message", "message", "language"?, "location"?} per turn.
+    # Server: "session" after hello, then "token" ... "done" for each turn.
+    session = None
+    while True:
+        try:
+            data = json.loads(ws.receive())
+        except (TypeError, ValueError):
+            data = None
+        # Valid JSON that is not a frame object (e.g. a list), or a frame
+        # whose location has no numeric coordinates, gets the same reply
+        if not isinstance(data, dict) or not valid_location(data.get("location")):
+            ws.send(json.dumps({"type": "error", "response": "invalid message"}))
+            continue
+        lang = data.get("language")
+        if not isinstance(lang, str) or lang not in translations:
+            lang = None
+        if session is None or data.get("type") == "hello":
+            session_id = data.get("session")
+            session = sessions.open(session_id if isinstance(session_id, str) else None, lang or "en")
+        if lang is not None:
+            session.lang = lang
+        if data.get("location") and data["location"] != session.location:
+            session.set_location(data["location"])
+
+        if data.get("type") == "hello":
+            ws.send(json.dumps({"type": "session", "session": session.id, "place": session_place(session)}, ensure_ascii=False))
+            continue
+        user_message = str(data.get("message", "")).strip().lower()
+        if not user_message:
+            ws.send(json.dumps({"type": "done", "response": translations[session.lang]["error"]}, ensure_ascii=False))
+            continue
+        for event in session_turn(session, user_message):
+            ws.send(json.dumps(event, ensure_ascii=False))
+
+
+@app.route("/chat/batch", methods=["POST"])
+def chat_batch():
+    items, error = parse_batch_request()
+    if error:
+        return jsonify({"error": error}), 400
+    if not items:
+        return jsonify({"error": "messages must be a non-empty list"}), 400
+    if len(items) > BATCH_MAX_MESSAGES:
+        return jsonify({"error": f"at most {BATCH_MAX_MESSAGES} messages per batch"}), 413
+
+    return Response(
+        stream_with_context(batch_results(items)),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    return jsonify({
+        "offline_geocoder": offline_geocoder.stats(),
+        "geocode_cache": location_cache.stats(),
+        "weather_cache": weather_cache.stats(),
+        "market_index": market_ingester.stats(),
+        "response_cache": response_cache.stats(),
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None,
+        "intents": dict(intent_counts),
+        "faq": faq.stats(),
+        "scheduler": scheduler.stats(),
+        "upstreams": http.stats(),
+        "chat_sessions": sessions.stats(),
+        "singleflight": {
+            "chat": llm_flight.stats(),
+            "stream": stream_flight.stats(),
+            "process": process_flight.stats() if process_flight is not None else None,
+        },
+        "http_latency": histogram_summaries("http_request_seconds"),
+        "llm_time_to_first_token": histogram_summaries("llm_time_to_first_token_seconds"),
+        "llm_tokens_per_second": histogram_summaries("llm_tokens_per_second"),
+        "llm_generation_seconds_by_tier": histogram_summaries("llm_generation_seconds"),
+        "dependency_latency": histogram_summaries("dependency_seconds"),
+    })
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(prometheus_text(), mimetype="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from bs4 import BeautifulSoup
+
+from metrics import percentile
+from stub_upstreams import start_stub_server, stub_environment
+
+# Compares the old sequential /chat handler (rebuilt below from the original
+# app.py) with today's /chat against local stub upstreams:
+#   python bench_chat.py --requests 200 --concurrency 16
+
+QUERY_MIX = [
+    ("how to control leaf blast in paddy", "en", True),
+    ("weather today", "en", True),
+    ("market price paddy", "en", False),
+    ("நெல் பயிருக்கு எந்த உரம் சிறந்தது", "ta", True),
+    ("இன்றைய வானிலை", "ta", True),
+]
+LOCATION = {"latitude": 10.787, "longitude": 79.1378}
+
+
+def sequential_reply(user_message, lang, location):
+    # The handler as it was before the async pipeline: no gazetteer, caches
+    # or scheduler, and every upstream call waits for the previous one.
+    # ollama's default client reads OLLAMA_HOST at import, so after main()
+    # has pointed it at the stub
+    import ollama
+    location_text = ""
+    if location:
+        lat, lon = location["latitude"], location["longitude"]
+        try:
+            response = requests.get(f"{os.environ['NOMINATIM_URL']}/reverse?format=json&lat={lat}&lon={lon}")
+            place = response.json().get("display_name", "Unknown location")
+        except Exception:
+            place = "Unknown location"
+        location_text = f" (உங்கள் இருப்பிடம்: {place})" if lang == "ta" else f" (User's location: {place})"
+        if "weather" in user_message or "வானிலை" in user_message:
+            return requests.get(f"{os.environ['WTTR_URL']}/{lat},{lon}?format=%C+%t&lang={lang}").text.strip()
+    if "market price" in user_message or "சந்தை விலை" in user_message:
+        crop = user_message.split()[-1]
+        response = requests.get(os.environ["AGMARKNET_URL"], headers={"User-Agent": "Mozilla/5.0"})
+        for row in BeautifulSoup(response.text, "html.parser").find("table").find_all("tr")[1:]:
+            columns = row.find_all("td")
+            if len(columns) > 1 and crop in columns[0].text.lower():
+                return f"{columns[0].text}: ₹{columns[1].text.strip()}"
+        return "No price data available for the selected crop."
+    response = ollama.chat(model="mistral", messages=[{"role": "user", "content": user_message}])
+    return response["message"]["content"] + location_text
+
+
+def run(label, handle, total, concurrency):
+    def one(i):
+        message, lang, located = QUERY_MIX[i % len(QUERY_MIX)]
+        start = time.perf_counter()
+        handle(message, lang, LOCATION if located else None)
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": label,
+        "requests": total,
+        "concurrency": concurrency,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "requests_per_sec": round(total / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    workdir = tempfile.TemporaryDirectory(prefix="bench_chat_")
+    os.environ.update({
+        **stub_environment(server),
+        # Caches of its own, never the app's real ones (stub replies would
+        # otherwise be served in production), and cold for every request:
+        # the first mode must not warm replies or weather for the second
+        "GEOCODE_CACHE_PATH": os.path.join(workdir.name, "geocode.sqlite3"),
+        "RESPONSE_CACHE_PATH": os.path.join(workdir.name, "responses.sqlite3"),
+        "SINGLEFLIGHT_LOCK_DIR": os.path.join(workdir.name, "locks"),
+        "RESPONSE_CACHE_TTL": "0",
+        "WEATHER_CACHE_TTL": "0",
+        "WEATHER_MAX_STALE": "0",
+        "SEMANTIC_CACHE": "0",
+        # The old handler had no scheduler; let every worker generate at once
+        "LLM_CONCURRENCY": str(args.concurrency),
+    })
+    import app as app_module
+
+    def concurrent_handle(message, lang, location):
+        app_module.app.test_client().post("/chat", json={"message": message, "language": lang, "location": location})
+
+    results = [
+        run("sequential", sequential_reply, args.requests, args.concurrency),
+        run("concurrent", concurrent_handle, args.requests, args.concurrency),
+    ]
+    print(json.dumps(results, indent=2))
+    server.shutdown()
+    workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: memory comes from psutil, if installed
+    resource = None
+
+from disease_export import sample_images
+from disease_model import LABELS_PATH, MODEL_PATH, image_array, load_class_labels, load_model, warm_up
+from metrics import percentile
+
+# Accuracy, latency and memory of each disease model backend, next to the
+# Keras baseline (the first model listed). Each backend is measured in its
+# own process so peak memory is its own:
+#   python bench_disease_backends.py --data C:\Desktop\proj\Final_dataset\test \
+#       --models model.keras,model_int8.tflite,model_int8.onnx
+
+
+def psutil_memory():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info()
+
+
+def rss_mb():
+    # Resident memory now, or None where neither /proc nor psutil is there
+    if os.path.exists("/proc/self/statm"):
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    memory = psutil_memory()
+    return memory.rss / 1e6 if memory is not None else None
+
+
+def peak_rss_mb():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+    memory = psutil_memory()
+    return memory.peak_wset / 1e6 if memory is not None else None
+
+
+def round_mb(value):
+    return round(value, 1) if value is not None else None
+
+
+def load_batch(chunk):
+    return np.stack([image_array(path) for path, _ in chunk]).astype(np.float32, copy=False)
+
+
+def measure(path, data, labels_path, limit, latency_runs, batch_size):
+    class_labels = load_class_labels(labels_path)
+    class_index = {name: index for index, name in class_labels.items()}
+    # Only paths are held; images are decoded a batch at a time below, so
+    # the sample set never shows up in the memory figures
+    samples = [(p, class_index[name]) for p, name in sample_images(data, limit, seed=1)]
+    batch = load_batch(samples[:batch_size])
+    single = batch[:1]
+
+    before = rss_mb()
+    started = time.perf_counter()
+    model = load_model(path)
+    load_seconds = time.perf_counter() - started
+    # Arenas and graphs are allocated on the first predict of each shape, so
+    # the resident cost is taken once both shapes have run
+    warm_up(model)
+    warm_up(model, len(batch))
+    loaded = rss_mb()
+
+    correct = 0
+    for offset in range(0, len(samples), batch_size):
+        chunk = samples[offset:offset + batch_size]
+        probabilities = model.predict(load_batch(chunk), verbose=0)
+        correct += sum(int(np.argmax(row)) == label for row, (_, label) in zip(probabilities, chunk))
+
+    latencies = []
+    for _ in range(latency_runs):
+        started = time.perf_counter()
+        model.predict(single, verbose=0)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(5):
+        model.predict(batch, verbose=0)
+    batch_seconds = (time.perf_counter() - started) / 5
+
+    return {
+        "model": path,
+        "file_mb": round(os.path.getsize(path) / 1e6, 2),
+        "load_seconds": round(load_seconds, 3),
+        "accuracy": round(correct / len(samples), 4),
+        "images": len(samples),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+        },
+        f"batch{len(batch)}_images_per_s": round(len(batch) / batch_seconds, 1),
+        # Resident growth from loading and warming the model
+        "model_rss_mb": round_mb(loaded - before if None not in (loaded, before) else None),
+        "peak_rss_mb": round_mb(peak_rss_mb()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", default=f"{MODEL_PATH},model_int8.tflite,model_int8.onnx")
+    parser.add_argument("--data", required=True, help="held-out folder, one directory per class")
+    parser.add_argument("--labels", default=LABELS_PATH)
+    parser.add_argument("--limit", type=int, default=1000, help="images scored per backend")
+    parser.add_argument("--latency-runs", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--one", help=argparse.SUPPRESS)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    if args.one:
+        print(json.dumps(measure(args.one, args.data, args.labels, args.limit, args.latency_runs, args.batch_size)))
+        return
+
+    results = []
+    for path in args.models.split(","):
+        command = [
+            sys.executable, os.path.abspath(__file__), "--one", path, "--data", args.data, "--labels", args.labels,
+            "--limit", str(args.limit), "--latency-runs", str(args.latency_runs), "--batch-size", str(args.batch_size),
+        ]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    baseline = results[0]
+    for result in results:
+        result["accuracy_drop"] = round(baseline["accuracy"] - result["accuracy"], 4)
+        result["p50_speedup"] = round(baseline["latency_ms"]["p50"] / result["latency_ms"]["p50"], 2)
+
+    text = json.dumps({"data": args.data, "baseline": baseline["model"], "backends": results}, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
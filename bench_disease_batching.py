@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from disease_model import IMAGE_SIZE, LABELS_PATH, MODEL_PATH, image_array, load_class_labels, load_model, predict_batch, warm_up
+from metrics import latency_ms
+from micro_batcher import MicroBatcher
+
+# Throughput against latency of the disease model behind MicroBatcher, in
+# process (no HTTP), for each batching setting at each concurrency level.
+# "1:0" is the unbatched baseline: every request is its own forward pass.
+#   python bench_disease_batching.py --images field_photos/ --concurrency 1,4,16,32
+#   python bench_disease_batching.py --settings 1:0,8:2,16:5,32:10 --requests 400
+
+
+def load_inputs(folder, limit):
+    if not folder:
+        # Random pixels cost the model exactly what photos do
+        rng = np.random.default_rng(0)
+        return [rng.random((*IMAGE_SIZE, 3), dtype=np.float32) for _ in range(limit)]
+    names = sorted(name for name in os.listdir(folder) if name.lower().endswith((".jpg", ".jpeg", ".png")))[:limit]
+    return [image_array(os.path.join(folder, name)).astype(np.float32) for name in names]
+
+
+def run_level(batcher, inputs, total, concurrency):
+    latencies = []
+    lock = threading.Lock()
+    remaining = [total]
+
+    def worker(offset):
+        index = offset
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            batcher.submit(inputs[index % len(inputs)]).result()
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+            index += concurrency
+
+    batches_before, items_before = batcher.batches, batcher.items
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+    batches = batcher.batches - batches_before
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_ips": round(len(latencies) / duration, 2),
+        "latency_ms": latency_ms(latencies),
+        "mean_batch_size": round((batcher.items - items_before) / max(1, batches), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--labels", default=LABELS_PATH)
+    parser.add_argument("--images", help="folder of photos (default: random tensors)")
+    parser.add_argument("--settings", default="1:0,8:2,16:5,32:10", help="max_batch:max_wait_ms pairs")
+    parser.add_argument("--concurrency", default="1,4,16,32")
+    parser.add_argument("--requests", type=int, default=256, help="requests per level")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    class_labels = load_class_labels(args.labels)
+    inputs = load_inputs(args.images, 64)
+    report = {"model": args.model, "inputs": args.images or "random", "settings": []}
+    for setting in args.settings.split(","):
+        max_batch, max_wait_ms = setting.split(":")
+        batcher = MicroBatcher(
+            lambda images: predict_batch(model, np.stack(images), class_labels),
+            max_batch=int(max_batch), max_wait=float(max_wait_ms) / 1000, max_queue=4096,
+            name=f"bench-{max_batch}-{max_wait_ms}",
+        )
+        warm_up(model, int(max_batch))
+        report["settings"].append({
+            "max_batch": int(max_batch),
+            "max_wait_ms": float(max_wait_ms),
+            "levels": [run_level(batcher, inputs, args.requests, int(c)) for c in args.concurrency.split(",")],
+        })
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
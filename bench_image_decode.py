@@ -0,0 +1,75 @@
+import argparse
+import io
+import json
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from image_preprocess import IMAGE_SIZE, decode_image
+from metrics import percentile
+
+# Decode time per photo: keras load_img (full decode, then resize) against
+# image_preprocess.decode_image (JPEG draft mode, into a preallocated
+# buffer). Photos are read into memory first, so disk speed is not timed:
+#   python bench_image_decode.py --images field_photos/ --repeat 3
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def keras_path(data):
+    from tensorflow.keras.preprocessing import image
+    loaded = image.load_img(io.BytesIO(data), target_size=IMAGE_SIZE)
+    return image.img_to_array(loaded) / 255.0
+
+
+def timings(decode, photos, repeat):
+    samples = []
+    for _ in range(repeat):
+        for data in photos:
+            started = time.perf_counter()
+            decode(data)
+            samples.append(time.perf_counter() - started)
+    return {
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", required=True, help="folder of field photos")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    names = sorted(name for name in os.listdir(args.images) if name.lower().endswith(IMAGE_EXTENSIONS))[:args.limit]
+    photos = []
+    for name in names:
+        with open(os.path.join(args.images, name), "rb") as f:
+            photos.append(f.read())
+    megapixels = []
+    for data in photos:
+        with Image.open(io.BytesIO(data)) as img:
+            megapixels.append(img.width * img.height / 1e6)
+
+    buffer = np.empty((*IMAGE_SIZE, 3), dtype=np.float32)
+    baseline = timings(keras_path, photos, args.repeat)
+    fast = timings(lambda data: decode_image(data, out=buffer), photos, args.repeat)
+    # How far the fast path's pixels are from what the model saw before
+    difference = np.mean([np.abs(keras_path(data) - decode_image(data)).mean() for data in photos[:50]])
+
+    print(json.dumps({
+        "photos": len(photos),
+        "mean_megapixels": round(sum(megapixels) / len(megapixels), 1),
+        "load_img": baseline,
+        "decode_image": fast,
+        "speedup": round(baseline["mean_ms"] / fast["mean_ms"], 2),
+        "mean_abs_pixel_difference": round(float(difference), 4),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import json
+import time
+from collections import Counter
+
+from intent_router import intent_router_from_env
+
+# Routing throughput and accuracy on labelled query files. The phrase lists
+# were tuned against chat_queries.jsonl; intent_heldout.jsonl was written
+# separately and is never tuned against, so its accuracy is the one to trust:
+#   python bench_intent.py --queries bench_data/chat_queries.jsonl,bench_data/intent_heldout.jsonl
+
+
+def load_rows(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(router, rows):
+    correct = 0
+    sources = Counter()
+    confusions = Counter()
+    for row in rows:
+        intent, confidence, source = router.route(row["text"])
+        sources[source] += 1
+        if intent == row["intent"]:
+            correct += 1
+        else:
+            confusions[f"{row['intent']} -> {intent}"] += 1
+    return {
+        "queries": len(rows),
+        "accuracy": round(correct / len(rows), 4),
+        "decided_by": dict(sources),
+        "llm_fallbacks_avoided": sum(1 for row in rows if router.route(row["text"])[0] != "chat"),
+        "confusions": dict(confusions.most_common()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", default="bench_data/chat_queries.jsonl,bench_data/intent_heldout.jsonl")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    files = {path: load_rows(path) for path in args.queries.split(",")}
+
+    started = time.perf_counter()
+    router = intent_router_from_env()
+    build_seconds = time.perf_counter() - started
+
+    rows = [row for file_rows in files.values() for row in file_rows]
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        for row in rows:
+            router.route(row["text"])
+    elapsed = time.perf_counter() - started
+    routed = args.rounds * len(rows)
+
+    print(json.dumps({
+        "files": {path: evaluate(router, file_rows) for path, file_rows in files.items()},
+        "routes_per_sec": round(routed / elapsed),
+        "mean_route_us": round(elapsed / routed * 1e6, 2),
+        "router_build_seconds": round(build_seconds, 3),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
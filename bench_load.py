@@ -0,0 +1,277 @@
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+import requests
+
+from metrics import latency_ms
+from stub_upstreams import start_stub_server, stub_environment
+
+# Load test for /chat against local stand-ins for every upstream. Starts the
+# stubs and app.py (flask, threaded) in a subprocess, drives it with a
+# bilingual query mix at each concurrency level, and prints JSON:
+#   python bench_load.py --concurrency 1,8,32 --requests 300
+#   python bench_load.py --jitter ollama=0.4 --error-rate wttr=0.05,ollama=0.02 --token-rate 25
+#   python bench_load.py --endpoint /chat/stream --cache-bust
+#   python bench_load.py --output run.json --baseline last.json   # exit 1 on regression
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LATENCY_PCTS = (50, 90, 95, 99)
+# Tamil Nadu points for located requests: Thanjavur, Madurai, Coimbatore, Chennai
+LOCATIONS = [(10.787, 79.1378), (9.9252, 78.1198), (11.0168, 76.9558), (13.0827, 80.2707)]
+
+
+def parse_pairs(text, cast=float):
+    # "ollama=0.8,wttr=0.2" -> {"ollama": 0.8, "wttr": 0.2}
+    if not text:
+        return {}
+    return {name: cast(value) for name, value in (item.split("=", 1) for item in text.split(","))}
+
+
+def load_queries(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(env, port, timeout=60):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port), "--with-threads"],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"app.py exited with code {process.returncode}")
+        try:
+            if requests.get(f"{base}/stats", timeout=2).ok:
+                return process, base
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("app.py did not start in time")
+
+
+class QueryMix:
+    # Picks the language first (so Tamil gets its configured share even
+    # though the recorded queries are mostly English), then a query in it.
+
+    def __init__(self, queries, tamil_share, located_share, cache_bust, seed):
+        self.by_lang = defaultdict(list)
+        for query in queries:
+            self.by_lang[query["lang"]].append(query)
+        self.tamil_share = tamil_share
+        self.located_share = located_share
+        self.cache_bust = cache_bust
+        self.random = random.Random(seed)
+        self.sequence = 0
+        self.lock = threading.Lock()
+
+    def next(self):
+        with self.lock:
+            self.sequence += 1
+            lang = "ta" if self.random.random() < self.tamil_share else "en"
+            query = self.random.choice(self.by_lang[lang] or self.by_lang["en"])
+            location = None
+            if self.random.random() < self.located_share:
+                lat, lon = self.random.choice(LOCATIONS)
+                location = {"latitude": lat, "longitude": lon}
+            message = query["text"]
+            if self.cache_bust:
+                # A distinct prompt per request, so every LLM-bound one
+                # reaches (fake) Ollama instead of the response cache
+                message = f"{message} {self.sequence}"
+            return query, {"message": message, "language": query["lang"], "location": location}
+
+
+def send(session, base, endpoint, payload, timeout):
+    # Returns (error kind or None, seconds to first token or None)
+    started = time.perf_counter()
+    if endpoint == "/chat/stream":
+        with session.post(base + endpoint, json=payload, timeout=timeout, stream=True) as response:
+            if response.status_code != 200:
+                return ("busy" if response.status_code == 429 else f"http_{response.status_code}"), None
+            first_token = None
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: ") and first_token is None:
+                    first_token = time.perf_counter() - started
+            return (event if event in ("busy", "error") else None), first_token
+
+    response = session.post(base + endpoint, json=payload, timeout=timeout)
+    if response.status_code != 200:
+        return ("busy" if response.status_code == 429 else f"http_{response.status_code}"), None
+    if response.json().get("response", "").startswith("Error:"):
+        return "error_reply", None
+    return None, None
+
+
+def run_level(base, endpoint, mix, total, concurrency, timeout):
+    results = []
+    results_lock = threading.Lock()
+    remaining = [total]
+
+    def worker():
+        session = requests.Session()
+        while True:
+            with results_lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            query, payload = mix.next()
+            started = time.perf_counter()
+            try:
+                error, first_token = send(session, base, endpoint, payload, timeout)
+            except requests.RequestException as e:
+                error, first_token = type(e).__name__, None
+            elapsed = time.perf_counter() - started
+            with results_lock:
+                results.append((query, elapsed, error, first_token))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    errors = Counter(error for _, _, error, _ in results if error)
+    by_intent = defaultdict(list)
+    for query, elapsed, error, _ in results:
+        if not error:
+            by_intent[query["intent"]].append(elapsed)
+    level = {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(results) / duration, 2),
+        "latency_ms": latency_ms([elapsed for _, elapsed, error, _ in results if not error], LATENCY_PCTS, 1),
+        "error_rate": round(sum(errors.values()) / max(1, len(results)), 4),
+        "errors": dict(errors),
+        "by_intent": {
+            intent: {"count": len(samples), **{k: v for k, v in latency_ms(samples, (50, 95), 1).items() if k in ("p50", "p95")}}
+            for intent, samples in sorted(by_intent.items())
+        },
+    }
+    if endpoint == "/chat/stream":
+        level["first_token_ms"] = latency_ms([first for _, _, error, first in results if first is not None], LATENCY_PCTS, 1)
+    return level
+
+
+def regressions(report, baseline, tolerance):
+    # p95 latency more than `tolerance` slower, throughput that much lower,
+    # or error rate up by more than a percentage point, at any shared level
+    found = []
+    previous = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in report["levels"]:
+        before = previous.get(level["concurrency"])
+        if before is None:
+            continue
+        name = f"concurrency={level['concurrency']}"
+        if level["latency_ms"].get("p95", 0) > before["latency_ms"].get("p95", 0) * (1 + tolerance):
+            found.append(f"{name}: p95 {before['latency_ms']['p95']}ms -> {level['latency_ms']['p95']}ms")
+        if level["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            found.append(f"{name}: throughput {before['throughput_rps']} -> {level['throughput_rps']} rps")
+        if level["error_rate"] > before["error_rate"] + 0.01:
+            found.append(f"{name}: error rate {before['error_rate']} -> {level['error_rate']}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", default=os.path.join(HERE, "bench_data", "chat_queries.jsonl"))
+    parser.add_argument("--endpoint", choices=["/chat", "/chat/stream"], default="/chat")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per level")
+    parser.add_argument("--tamil-share", type=float, default=0.5)
+    parser.add_argument("--located-share", type=float, default=0.6)
+    parser.add_argument("--cache-bust", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=180)
+    parser.add_argument("--latency", help="stub latency overrides in seconds, e.g. ollama=1.5,wttr=0.3")
+    parser.add_argument("--jitter", help="lognormal sigma per stub, e.g. ollama=0.4")
+    parser.add_argument("--error-rate", help="503 probability per stub, e.g. wttr=0.05")
+    parser.add_argument("--token-rate", type=float, help="fake Ollama tokens/sec (after the latency)")
+    parser.add_argument("--reply-words", type=int, help="fake Ollama reply length")
+    parser.add_argument("--app-env", help="extra app.py settings, e.g. LLM_CONCURRENCY=4,LLM_MAX_QUEUE=64")
+    parser.add_argument("--target", help="load an already running server instead (its upstreams are its own)")
+    parser.add_argument("--output")
+    parser.add_argument("--baseline", help="earlier --output file; exit 1 if this run regressed")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    stub_config = {
+        "latency": parse_pairs(args.latency),
+        "jitter": parse_pairs(args.jitter),
+        "error_rate": parse_pairs(args.error_rate),
+        "token_rate": args.token_rate,
+        "reply_words": args.reply_words,
+    }
+    process = None
+    workdir = tempfile.TemporaryDirectory(prefix="bench_load_")
+    if args.target:
+        base = args.target.rstrip("/")
+    else:
+        server = start_stub_server(**stub_config)
+        env = {
+            **os.environ,
+            **stub_environment(server),
+            # Fresh caches per run, so results do not depend on earlier runs
+            "GEOCODE_CACHE_PATH": os.path.join(workdir.name, "geocode.sqlite3"),
+            "RESPONSE_CACHE_PATH": os.path.join(workdir.name, "responses.sqlite3"),
+            "SINGLEFLIGHT_LOCK_DIR": os.path.join(workdir.name, "locks"),
+            **parse_pairs(args.app_env, cast=str),
+        }
+        process, base = start_app(env, free_port())
+
+    mix = QueryMix(load_queries(args.queries), args.tamil_share, args.located_share, args.cache_bust, args.seed)
+    try:
+        levels = [
+            run_level(base, args.endpoint, mix, args.requests, int(concurrency), args.timeout)
+            for concurrency in args.concurrency.split(",")
+        ]
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        workdir.cleanup()
+
+    report = {
+        "endpoint": args.endpoint,
+        "target": args.target or "local app.py + stubs",
+        "stubs": None if args.target else stub_config,
+        "query_mix": {"tamil_share": args.tamil_share, "located_share": args.located_share, "cache_bust": args.cache_bust},
+        "levels": levels,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            found = regressions(report, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import json
+import statistics
+import time
+from collections import Counter, defaultdict
+
+import ollama
+
+from metrics import percentile
+from model_router import ModelRouter, ModelTier
+from stub_upstreams import start_stub_server, stub_environment
+
+# Replays recorded /chat questions against one large model and against the
+# small/large tier split, and reports how much average latency drops:
+#   python bench_model_tiers.py                                  # stub Ollama
+#   python bench_model_tiers.py --ollama-host http://localhost:11434 \
+#       --small-model qwen2.5:1.5b-instruct-q4_K_M --large-model mistral
+
+
+def load_queries(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay(client, router, queries):
+    latencies = []
+    by_tier = defaultdict(list)
+    for query in queries:
+        tier = router.choose(query["text"])
+        started = time.perf_counter()
+        client.chat(model=tier.model, messages=[{"role": "user", "content": query["text"]}])
+        elapsed = time.perf_counter() - started
+        latencies.append(elapsed)
+        by_tier[tier.name].append(elapsed)
+
+    shares = Counter({name: len(values) for name, values in by_tier.items()})
+    return {
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "tier_share": {name: round(count / len(queries), 3) for name, count in shares.items()},
+        "tier_mean_ms": {name: round(statistics.mean(values) * 1000, 1) for name, values in by_tier.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", default="bench_data/chat_queries.jsonl")
+    parser.add_argument("--ollama-host", help="real Ollama server; defaults to a local stub")
+    parser.add_argument("--small-model", default="qwen2.5:1.5b-instruct-q4_K_M")
+    parser.add_argument("--large-model", default="mistral")
+    parser.add_argument("--max-words", type=int, default=12)
+    parser.add_argument("--max-complexity", type=float, default=1.0)
+    parser.add_argument("--stub-small-latency", type=float, default=0.25)
+    parser.add_argument("--stub-large-latency", type=float, default=0.8)
+    args = parser.parse_args()
+
+    host = args.ollama_host
+    if host is None:
+        server = start_stub_server(latency={"ollama_models": {
+            args.small_model: args.stub_small_latency,
+            args.large_model: args.stub_large_latency,
+        }})
+        host = stub_environment(server)["OLLAMA_HOST"]
+    client = ollama.Client(host=host)
+
+    queries = load_queries(args.queries)
+    large_only = ModelRouter([ModelTier("large", args.large_model)])
+    tiered = ModelRouter([
+        ModelTier("small", args.small_model, max_words=args.max_words, max_complexity=args.max_complexity),
+        ModelTier("large", args.large_model),
+    ])
+
+    baseline = replay(client, large_only, queries)
+    routed = replay(client, tiered, queries)
+    print(json.dumps({
+        "queries": len(queries),
+        "ollama_host": host,
+        "large_only": baseline,
+        "tiered": routed,
+        "mean_latency_drop": round(1 - routed["mean_ms"] / baseline["mean_ms"], 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
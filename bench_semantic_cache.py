@@ -0,0 +1,87 @@
+import argparse
+import json
+import time
+
+from semantic_cache import HashingEmbedder, OllamaEmbedder, SemanticCache
+from textnorm import normalize_prompt
+
+# Replays recorded /chat questions through the exact-match and semantic
+# caches and reports how many Mistral generations each layer would save.
+# Each query carries a paraphrase group; a semantic hit on an answer from
+# another group (fertilizer for paddy answered with the one for banana) is
+# a false hit and saves nothing:
+#   python bench_semantic_cache.py --embedder hashing --threshold 0.75,0.8,0.9
+
+
+def load_queries(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay(queries, semantic):
+    exact = set()
+    exact_hits = 0
+    semantic_hits = 0
+    false_hits = []
+    embed_seconds = 0.0
+    for query in queries:
+        key = (query["lang"], normalize_prompt(query["text"]))
+        if key in exact:
+            exact_hits += 1
+            continue
+        vector = None
+        if semantic is not None:
+            started = time.perf_counter()
+            match, vector = semantic.get(query["text"], query["lang"], "mistral")
+            embed_seconds += time.perf_counter() - started
+            if match is not None:
+                semantic_hits += 1
+                answer, score = match
+                if answer["group"] != query["group"]:
+                    false_hits.append(f"{query['text']} -> {answer['text']} ({score:.3f})")
+                continue
+        # Miss: this is where the LLM would be called
+        exact.add(key)
+        if semantic is not None:
+            semantic.add(query["text"], query["lang"], "mistral", query, vector)
+
+    total = len(queries)
+    llm_calls = total - exact_hits - semantic_hits
+    return {
+        "queries": total,
+        "exact_hits": exact_hits,
+        "semantic_hits": semantic_hits,
+        "false_hits": len(false_hits),
+        "hit_rate": round((exact_hits + semantic_hits) / total, 4),
+        "false_hit_rate": round(len(false_hits) / total, 4),
+        "semantic_precision": round(1 - len(false_hits) / semantic_hits, 4) if semantic_hits else None,
+        "llm_calls": llm_calls,
+        "llm_calls_saved": total - llm_calls - len(false_hits),
+        "semantic_lookup_ms_avg": round(embed_seconds / max(1, total - exact_hits) * 1000, 3),
+        "false_hit_examples": false_hits[:10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", default="bench_data/chat_queries.jsonl")
+    parser.add_argument("--embedder", choices=["hashing", "ollama"], default="hashing")
+    parser.add_argument("--model", default="all-minilm")
+    parser.add_argument("--threshold", default="0.9", help="comma-separated thresholds to compare")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    embedder = HashingEmbedder() if args.embedder == "hashing" else OllamaEmbedder(args.model)
+    results = {
+        "embedder": args.embedder,
+        "exact_only": replay(queries, None),
+        "exact_plus_semantic": {
+            threshold: replay(queries, SemanticCache(embedder, threshold=float(threshold)))
+            for threshold in args.threshold.split(",")
+        },
+    }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import re
+import unicodedata
+
+# Canonical crop -> English variants, Tamil names and common transliterations
+CROP_ALIASES = {
+    "paddy": ["paddy", "rice", "dhan", "nel", "arisi", "நெல்", "அரிசி"],
+    "wheat": ["wheat", "godhumai", "கோதுமை"],
+    "maize": ["maize", "corn", "makkacholam", "மக்காச்சோளம்"],
+    "jowar": ["jowar", "sorghum", "cholam", "சோளம்"],
+    "bajra": ["bajra", "pearl millet", "kambu", "கம்பு"],
+    "ragi": ["ragi", "finger millet", "kezhvaragu", "கேழ்வரகு", "ராகி"],
+    "groundnut": ["groundnut", "peanut", "nilakadalai", "kadalai", "நிலக்கடலை", "கடலை"],
+    "gingelly": ["gingelly", "sesame", "ellu", "எள்"],
+    "bengal gram": ["bengal gram", "chana", "kondakadalai", "கொண்டைக்கடலை"],
+    "black gram": ["black gram", "urad", "ulundhu", "உளுந்து"],
+    "green gram": ["green gram", "moong", "pasipayaru", "பாசிப்பயறு"],
+    "red gram": ["red gram", "arhar", "tur", "thuvarai", "துவரை"],
+    "cotton": ["cotton", "paruthi", "பருத்தி"],
+    "sugarcane": ["sugarcane", "karumbu", "கரும்பு"],
+    "coconut": ["coconut", "thengai", "தேங்காய்", "தென்னை"],
+    "banana": ["banana", "vazhai", "valai", "வாழை", "வாழைப்பழம்"],
+    "mango": ["mango", "maanga", "மாம்பழம்", "மாங்காய்"],
+    "tomato": ["tomato", "thakkali", "தக்காளி"],
+    "brinjal": ["brinjal", "eggplant", "kathirikai", "கத்தரிக்காய்", "கத்திரிக்காய்"],
+    "bhindi": ["bhindi", "ladies finger", "okra", "vendakkai", "வெண்டைக்காய்"],
+    "onion": ["onion", "vengayam", "வெங்காயம்"],
+    "potato": ["potato", "urulaikizhangu", "உருளைக்கிழங்கு"],
+    "tapioca": ["tapioca", "cassava", "maravalli", "மரவள்ளி"],
+    "chilli": ["chilli", "chillies", "milagai", "மிளகாய்"],
+    "black pepper": ["black pepper", "milagu", "மிளகு"],
+    "turmeric": ["turmeric", "manjal", "மஞ்சள்"],
+    "ginger": ["ginger", "inji", "இஞ்சி"],
+    "garlic": ["garlic", "poondu", "பூண்டு"],
+    "cardamom": ["cardamom", "elakkai", "ஏலக்காய்"],
+    "cabbage": ["cabbage", "muttaikose", "முட்டைக்கோஸ்"],
+    "carrot": ["carrot", "கேரட்"],
+    "beans": ["beans", "avarai", "அவரை"],
+}
+
+# Words in a price query that must never fuzzy-match a crop ("price" ~ "rice")
+STOPWORDS = {
+    "market", "price", "prices", "rate", "rates", "today", "todays", "what", "is",
+    "the", "of", "for", "in", "at", "and", "me", "tell", "current", "mandi",
+    "விலை", "சந்தை", "இன்று", "இன்றைய", "என்ன",
+}
+
+TOKEN_PATTERN = re.compile(r"[\w\u0B80-\u0BFF]+")
+
+EXACT, PREFIX, FUZZY = 3, 2, 1
+
+
+def normalize_crop_text(text):
+    text = unicodedata.normalize("NFC", text).casefold()
+    return " ".join(TOKEN_PATTERN.findall(re.sub(r"\(.*?\)", " ", text)))
+
+
+class TrieNode:
+    __slots__ = ("children", "crops")
+
+    def __init__(self):
+        self.children = {}
+        self.crops = None
+
+
+class CropIndex:
+    # Alias trie for one price snapshot. Each alias resolves to the snapshot
+    # commodity keys of its canonical crop, so a search returns commodities
+    # that can actually be priced.
+
+    def __init__(self, commodity_keys, aliases=CROP_ALIASES):
+        self.root = TrieNode()
+        for canonical, names in aliases.items():
+            words = [f" {normalize_crop_text(name)} " for name in names if name.isascii()]
+            matches = {
+                key for key in commodity_keys
+                if any(word in f" {normalize_crop_text(key)} " for word in words)
+            }
+            if matches:
+                for name in names:
+                    self.add(normalize_crop_text(name), matches)
+        for key in commodity_keys:
+            name = normalize_crop_text(key)
+            if name:
+                self.add(name, {key})
+
+    def add(self, alias, commodities):
+        node = self.root
+        for char in alias:
+            node = node.children.setdefault(char, TrieNode())
+        node.crops = (node.crops or frozenset()) | frozenset(commodities)
+
+    def walk(self, text, start):
+        # Yields (end, crops) for every alias that starts at text[start]
+        node = self.root
+        for position in range(start, len(text)):
+            node = node.children.get(text[position])
+            if node is None:
+                return
+            if node.crops:
+                yield position + 1, node.crops
+
+    def fuzzy(self, token, max_distance):
+        # Levenshtein search over the trie, pruning branches whose best
+        # possible distance already exceeds the bound.
+        found = {}
+        first_row = list(range(len(token) + 1))
+
+        def visit(node, char, previous_row):
+            row = [previous_row[0] + 1]
+            for column in range(1, len(token) + 1):
+                cost = 0 if token[column - 1] == char else 1
+                row.append(min(row[column - 1] + 1, previous_row[column] + 1, previous_row[column - 1] + cost))
+            if node.crops and row[-1] <= max_distance:
+                for crop in node.crops:
+                    found[crop] = min(found.get(crop, max_distance), row[-1])
+            if min(row) <= max_distance:
+                for next_char, child in node.children.items():
+                    if next_char != " ":
+                        visit(child, next_char, row)
+
+        for char, child in self.root.children.items():
+            visit(child, char, first_row)
+        return found
+
+    def search(self, text, limit=5):
+        # Ranked (commodity, score) candidates for a free-text crop mention.
+        # Whole-alias matches beat aliases followed by a Tamil case suffix or
+        # plural, which beat bounded edit-distance matches.
+        text = normalize_crop_text(text)
+        scores = {}
+        starts = [match.start() for match in re.finditer(r"\S+", text)]
+        matched_tokens = set()
+        for start in starts:
+            whole_matches, prefix_matches = [], []
+            for end, crops in self.walk(text, start):
+                if end == len(text) or text[end] == " ":
+                    whole_matches.append(((EXACT, end - start), crops))
+                elif end - start >= 3:
+                    prefix_matches.append(((PREFIX, end - start), crops))
+            # "tur" inside "turmeric" is not a red gram mention
+            for score, crops in whole_matches or prefix_matches[-1:]:
+                for crop in crops:
+                    scores[crop] = max(scores.get(crop, score), score)
+                matched_tokens.add(start)
+
+        for start in starts:
+            token = text[start:].split(" ", 1)[0]
+            if start in matched_tokens or token in STOPWORDS or len(token) < 4:
+                continue
+            max_distance = 1 if len(token) < 8 else 2
+            for crop, distance in self.fuzzy(token, max_distance).items():
+                score = (FUZZY, -distance)
+                scores[crop] = max(scores.get(crop, score), score)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [(crop, score[0]) for crop, score in ranked[:limit]]
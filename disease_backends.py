@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+
+# Interchangeable runtimes for the disease model, picked by file extension:
+# the Keras original (.keras/.h5), and the int8 exports written by
+# disease_export.py (.tflite, .onnx). Each takes a float32 (n, 224, 224, 3)
+# batch scaled to [0, 1] and returns (n, classes) probabilities; predict()
+# mirrors keras Model.predict, so disease_model.py treats them alike.
+
+
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, path):
+        from tensorflow import keras
+        self.model = keras.models.load_model(path)
+
+    def predict(self, batch, verbose=0):
+        return self.model.predict(batch, verbose=verbose)
+
+
+def quantize(values, details):
+    scale, zero_point = details["quantization"]
+    if not scale:
+        return values.astype(details["dtype"])
+    info = np.iinfo(details["dtype"])
+    return np.clip(np.round(values / scale + zero_point), info.min, info.max).astype(details["dtype"])
+
+
+def dequantize(values, details):
+    scale, zero_point = details["quantization"]
+    if not scale:
+        return values.astype(np.float32)
+    return (values.astype(np.float32) - zero_point) * scale
+
+
+class TFLiteBackend:
+    # A TFLite interpreter's tensors are sized for one batch shape, and the
+    # micro-batcher's batch sizes vary from call to call. Rather than
+    # resizing and reallocating on nearly every batch, each batch is padded
+    # up to the next power of two and run on an interpreter kept for that
+    # size: at most log2(max_batch) + 1 interpreters, each allocated once.
+    name = "tflite"
+
+    def __init__(self, path, threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self.make_interpreter = lambda: Interpreter(model_path=path, num_threads=threads or os.cpu_count())
+        interpreter = self.make_interpreter()
+        interpreter.allocate_tensors()
+        input_details = interpreter.get_input_details()[0]
+        self.input_shape = tuple(input_details["shape"][1:])
+        # batch size -> (interpreter, padded input buffer)
+        self.runners = {int(input_details["shape"][0]): (interpreter, np.zeros(input_details["shape"], np.float32))}
+
+    def runner(self, size):
+        if size in self.runners:
+            return self.runners[size]
+        padded = 1 << (size - 1).bit_length()
+        if padded not in self.runners:
+            interpreter = self.make_interpreter()
+            interpreter.resize_tensor_input(interpreter.get_input_details()[0]["index"], [padded, *self.input_shape])
+            interpreter.allocate_tensors()
+            self.runners[padded] = (interpreter, np.zeros((padded, *self.input_shape), np.float32))
+        return self.runners[padded]
+
+    def predict(self, batch, verbose=0):
+        interpreter, buffer = self.runner(len(batch))
+        # Rows past the batch keep whatever an earlier batch left there;
+        # their outputs are dropped
+        buffer[:len(batch)] = batch
+        input_details = interpreter.get_input_details()[0]
+        output_details = interpreter.get_output_details()[0]
+        # Float I/O models take the batch as is; fully integer ones need it quantized
+        interpreter.set_tensor(input_details["index"], quantize(buffer, input_details))
+        interpreter.invoke()
+        return dequantize(interpreter.get_tensor(output_details["index"])[:len(batch)], output_details)
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, path, threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch, verbose=0):
+        return self.session.run(None, {self.input_name: batch.astype(np.float32, copy=False)})[0]
+
+
+BACKENDS = {".keras": KerasBackend, ".h5": KerasBackend, ".tflite": TFLiteBackend, ".onnx": OnnxBackend}
+
+
+def load_backend(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in BACKENDS:
+        raise ValueError(f"no disease model backend for {extension or path!r} files")
+    return BACKENDS[extension](path)
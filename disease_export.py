@@ -0,0 +1,103 @@
+import argparse
+import os
+import random
+import tempfile
+
+import numpy as np
+
+from disease_model import IMAGE_SIZE, MODEL_PATH, image_array
+
+# Post-training int8 export of model.keras for CPU serving, calibrated on a
+# sample of the validation set (activation ranges come from real leaves,
+# not random noise). Inputs and outputs stay float32, so the exports take
+# the same [0, 1] tensors as the Keras model and load through
+# disease_backends.py:
+#   python disease_export.py --calibration C:\Desktop\proj\Final_dataset\valid --formats tflite,onnx
+# TFLite needs tensorflow; ONNX also needs tf2onnx and onnxruntime.
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def labelled_images(folder):
+    # [(path, class directory name)] from a flow_from_directory layout
+    found = []
+    for class_name in sorted(os.listdir(folder)):
+        class_dir = os.path.join(folder, class_name)
+        if os.path.isdir(class_dir):
+            found.extend(
+                (os.path.join(class_dir, name), class_name)
+                for name in sorted(os.listdir(class_dir))
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+    return found
+
+
+def sample_images(folder, limit, seed=0):
+    # A seeded sample, so calibration and evaluation runs are repeatable
+    images = labelled_images(folder)
+    random.Random(seed).shuffle(images)
+    return images[:limit]
+
+
+def calibration_batches(folder, samples):
+    for path, _ in sample_images(folder, samples):
+        yield image_array(path).astype(np.float32)[None]
+
+
+def export_tflite(model, calibration, samples, path):
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = lambda: ([batch] for batch in calibration_batches(calibration, samples))
+    # Every op in int8; only the float32 input and output are converted at the edges
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+
+
+def export_onnx(model, calibration, samples, path):
+    import tensorflow as tf
+    import tf2onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    class ValidationReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.batches = ({input_name: batch} for batch in calibration_batches(calibration, samples))
+
+        def get_next(self):
+            return next(self.batches, None)
+
+    with tempfile.TemporaryDirectory(prefix="disease_onnx_") as workdir:
+        float_path = os.path.join(workdir, "model_float.onnx")
+        signature = (tf.TensorSpec((None, *IMAGE_SIZE, 3), tf.float32, name="image"),)
+        tf2onnx.convert.from_keras(model, input_signature=signature, opset=13, output_path=float_path)
+        quantize_static(
+            float_path, path, ValidationReader("image"),
+            quant_format=QuantFormat.QDQ, per_channel=True,
+            activation_type=QuantType.QInt8, weight_type=QuantType.QInt8,
+        )
+
+
+EXPORTERS = {"tflite": export_tflite, "onnx": export_onnx}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--calibration", required=True, help="validation folder, one directory per class")
+    parser.add_argument("--samples", type=int, default=300, help="calibration images")
+    parser.add_argument("--formats", default="tflite,onnx")
+    parser.add_argument("--output-prefix", help="default: the model path without its extension, plus _int8")
+    args = parser.parse_args()
+
+    from tensorflow import keras
+    model = keras.models.load_model(args.model)
+    prefix = args.output_prefix or os.path.splitext(args.model)[0] + "_int8"
+    for name in args.formats.split(","):
+        path = f"{prefix}.{name}"
+        EXPORTERS[name](model, args.calibration, args.samples, path)
+        print(f"{path}: {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import json
+import os
+
+import numpy as np
+
+from disease_backends import load_backend
+from image_preprocess import IMAGE_SIZE, decode_image
+
+# Shared by the training scripts and disease_service.py: what the model's
+# classes mean to a farmer, and how one image becomes a prediction.
+
+MODEL_PATH = os.environ.get("DISEASE_MODEL_PATH", "model.keras")
+LABELS_PATH = os.environ.get("DISEASE_LABELS_PATH", "class_labels.json")
+
+# Class directory name -> (disease name, description)
+DISEASE_INFO = {
+    "Pepper_bell__Bacterial_spot": ("Bacterial Spot", "A bacterial infection causing dark, water-soaked spots on leaves and fruits, leading to reduced yield."),
+    "Pepper_bell__healthy": ("Healthy Pepper Plant", "No visible disease symptoms, vibrant green leaves, and normal fruit development."),
+    "Potato___Early_blight": ("Early Blight", "Dark brown spots with concentric rings on leaves caused by Alternaria solani. Weakens the plant and reduces tuber size."),
+    "Potato___healthy": ("Healthy Potato Plant", "No signs of disease, with strong foliage and uniform tuber growth."),
+    "Potato___Late_blight": ("Late Blight", "Deadly fungal disease (Phytophthora infestans) causing dark, water-soaked lesions on leaves and tubers."),
+    "Rice_BACTERIAL LEAF BLIGHT": ("Bacterial Leaf Blight", "Water-soaked streaks on leaves turning yellow and brown, caused by Xanthomonas oryzae."),
+    "Rice_BROWN SPOT": ("Brown Spot", "Brown lesions with yellow halos on leaves and grains caused by Cochliobolus miyabeanus."),
+    "Rice_DEFICIENCY- MAGNESIUM": ("Magnesium Deficiency", "Yellowing between leaf veins, stunted growth, and poor grain filling."),
+    "Rice_DEFICIENCY- NITROGEN": ("Nitrogen Deficiency", "Pale yellowing leaves and reduced tillering due to lack of nitrogen."),
+    "Rice_DEFICIENCY- NITROGEN MANGANESE POTASSIUM MAGNESIUM and ZINC": ("Multiple Nutrient Deficiency", "Stunted growth, discoloration, weak stems, and poor grain formation."),
+    "Rice_DISEASE- Narrow Brown Spot NUTRIENT DEFFICIENT- Nitrogen -N- Potassium -K- Calcium -Ca-": ("Narrow Brown Spot", "Small, dark brown spots with yellow halos affecting leaves, often linked to nitrogen and potassium deficiencies."),
+    "Rice_DISEASE- Bacterial Leaf Blight NUTRIENT DEFFICIENT- Silicon": ("Bacterial Leaf Blight & Silicon Deficiency", "Combination of bacterial streaks and poor resistance due to silicon deficiency."),
+    "Rice_DISEASE- Hispa NUTRIENT DEFFICENCY- N-A - Integrated pest management practices-": ("Hispa", "Leaf scraping damage by Hispa beetles, causing parallel white streaks, worsened by nutrient deficiencies."),
+    "Rice_DISEASE- Lead Scald NUTRIENT DEFFICIENT- Nitrogen -N- Potassium -K- Calcium -Ca- Sulfur -S-": ("Leaf Scald", "Long reddish-brown lesions, exacerbated by nitrogen, potassium, calcium, and sulfur deficiencies."),
+    "Rice_DISEASE- Leaf Blast NUTRIENT DEFFICIENT- Silicon- Nitrogen -N- Potassium -K- Potassium -K- Calcium -Ca-": ("Leaf Blast", "White to gray spots on leaves that expand into lesions, worsened by multiple nutrient deficiencies."),
+    "Rice_HEALTHY": ("Healthy Rice Plant", "No signs of disease, strong green leaves, and normal growth."),
+    "Rice_HISPA": ("Rice Hispa", "Damage by Hispa beetles, causing white parallel lines and skeletonized leaves."),
+    "Rice_LEAFBLAST": ("Leaf Blast", "Gray-green lesions on leaves that enlarge into spindle-shaped spots, leading to severe yield loss."),
+    "SC_Bacterial Blight": ("Sugarcane Bacterial Blight", "Leaf scald, wilting, and white streaks on leaves caused by Xanthomonas albilineans."),
+    "SC_BrownRust": ("Brown Rust", "Fungal disease causing reddish-brown pustules on leaves, reducing photosynthesis and yield."),
+    "SC_Dried Leaves": ("Dried Leaves", "Physiological drying due to aging, water stress, or disease."),
+    "SC_Healthy": ("Healthy Sugarcane Plant", "Lush green leaves, no visible disease symptoms, and strong stalks."),
+    "SC_Mawa": ("Mawa Disease", "A viral disease causing severe stunting and yellowing of sugarcane plants."),
+    "SC_Mites": ("Mite Infestation", "Tiny mites sucking plant sap, leading to yellowing and poor growth."),
+    "SC_Red Rot": ("Red Rot", "Severe fungal disease (Colletotrichum falcatum) causing internal red discoloration of stems, leading to rotting."),
+    "SC_RedSpot": ("Red Spot", "Small reddish lesions appearing on leaves, affecting plant health."),
+    "SC_YellowLeaf": ("Yellow Leaf Disease", "Yellowing of leaves due to a viral infection, reducing sugar content in canes."),
+    "Tomato__Target_Spot": ("Target Spot", "Circular spots with grayish centers on leaves caused by Corynespora cassiicola."),
+    "Tomato__Tomato_mosaic_virus": ("Tomato Mosaic Virus", "Mosaic-like yellow and green mottling on leaves, affecting fruit quality."),
+    "Tomato_Tomato_YellowLeaf_Curl_Virus": ("Yellow Leaf Curl Virus", "Yellow, curled leaves and stunted growth caused by a viral infection spread by whiteflies."),
+    "Tomato_Bacterial_spot": ("Bacterial Spot", "Small, dark spots on leaves and fruits, caused by Xanthomonas spp."),
+    "Tomato_Early_blight": ("Early Blight", "Dark spots with concentric rings caused by Alternaria solani, leading to premature leaf drop."),
+    "Tomato_healthy": ("Healthy Tomato Plant", "No disease symptoms, vibrant green leaves, and uniform fruit development."),
+    "Tomato_Late_blight": ("Late Blight", "A devastating fungal disease (Phytophthora infestans) causing dark, wet lesions and rapid plant death."),
+    "Tomato_Leaf_Mold": ("Leaf Mold", "Yellow spots on upper leaves with mold growth underneath, caused by Passalora fulva."),
+    "Tomato_Septoria_leaf_spot": ("Septoria Leaf Spot", "Numerous small, dark spots with light centers, leading to leaf drop."),
+    "Tomato_Spider_mites_Two_spotted_spider_mite": ("Spider Mite Infestation", "Tiny arachnids sucking plant sap, causing yellow speckling and webbing."),
+}
+# server.py's copy of the dataset spells a few directories differently
+DISEASE_INFO["Pepper__bell___Bacterial_spot"] = DISEASE_INFO["Pepper_bell__Bacterial_spot"]
+DISEASE_INFO["Pepper__bell___healthy"] = DISEASE_INFO["Pepper_bell__healthy"]
+DISEASE_INFO["Tomato__Tomato_YellowLeaf__Curl_Virus"] = DISEASE_INFO["Tomato_Tomato_YellowLeaf_Curl_Virus"]
+
+UNKNOWN_DISEASE = (
+    "No Matching Disease Found",
+    "The uploaded image does not match any known disease in the dataset.",
+)
+
+
+def load_class_labels(path=LABELS_PATH):
+    # The training scripts dump {index: name}; JSON turns the indices into strings
+    with open(path, encoding="utf-8") as f:
+        return {int(index): name for index, name in json.load(f).items()}
+
+
+def load_model(path=MODEL_PATH):
+    # model.keras, or an int8 export of it (see disease_backends.py)
+    return load_backend(path)
+
+
+def image_array(img):
+    # A path or a file-like object (e.g. an upload's bytes in io.BytesIO),
+    # resized and scaled to [0, 1] as in training
+    if hasattr(img, "read"):
+        return decode_image(img.read())
+    with open(img, "rb") as f:
+        return decode_image(f.read())
+
+
+def describe(class_name, confidence):
+    disease_name, description = DISEASE_INFO.get(class_name, UNKNOWN_DISEASE)
+    return {"Disease Name": disease_name, "Description": description, "Accuracy": f"{confidence:.2f}%"}
+
+
+def predict_batch(model, batch, class_labels):
+    # One forward pass over a (n, 224, 224, 3) batch, one result per image
+    probabilities = model.predict(batch, verbose=0)
+    results = []
+    for row in probabilities:
+        predicted_class = int(np.argmax(row))
+        results.append(describe(class_labels[predicted_class], float(row[predicted_class]) * 100))
+    return results
+
+
+def warm_up(model, batch_size=1):
+    # The first predict traces and compiles the graph; do it before serving
+    model.predict(np.zeros((batch_size, *IMAGE_SIZE, 3), dtype=np.float32), verbose=0)
+
+
+def predict_disease(img_path, model, class_labels):
+    return predict_batch(model, np.expand_dims(image_array(img_path), axis=0), class_labels)[0]
@@ -0,0 +1,120 @@
+import os
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import numpy as np
+from PIL import Image
+from flask import Flask, Response, g, request, jsonify
+from flask_cors import CORS
+
+from micro_batcher import BatcherBusy, micro_batcher_from_env
+from image_preprocess import decode_image
+from phash_cache import dhash, prediction_cache_from_env
+from metrics import histogram, prometheus_text, server_timing, span, start_request_spans
+from disease_model import IMAGE_SIZE, LABELS_PATH, MODEL_PATH, load_class_labels, load_model, predict_batch, warm_up
+
+# Crop disease predictions over HTTP. The model and its labels are loaded
+# once when the process starts and the graph is warmed before the first
+# request, instead of retraining at import as crop-detect.py does:
+#   DISEASE_MODEL_PATH=model.keras flask --app disease_service run --port 5001
+#   curl -F image=@leaf.jpg http://127.0.0.1:5001/predict
+
+app = Flask(__name__)
+CORS(app, resources={r"/*": {"origins": "*"}})
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("DISEASE_MAX_UPLOAD_BYTES", 16 * 1024 * 1024))
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
+# Longest a request waits for its batch (queueing plus the forward pass)
+PREDICT_TIMEOUT = float(os.environ.get("DISEASE_PREDICT_TIMEOUT", 30))
+
+# Resent photos and near-identical burst shots (see phash_cache.py)
+prediction_cache = prediction_cache_from_env()
+startup = {}
+
+
+def stack_batch(images):
+    # Batches are only ever built on the batcher's one worker thread, so
+    # they can all share one preallocated buffer
+    return np.stack(images, out=batch_buffer[:len(images)])
+
+
+started = time.perf_counter()
+model = load_model(MODEL_PATH)
+class_labels = load_class_labels(LABELS_PATH)
+startup["load_seconds"] = round(time.perf_counter() - started, 3)
+histogram("disease_model_load_seconds").record(startup["load_seconds"])
+
+started = time.perf_counter()
+# Concurrent uploads share forward passes (see micro_batcher.py); the
+# largest batch shape is warmed as well as a single image
+batcher = micro_batcher_from_env(lambda images: predict_batch(model, stack_batch(images), class_labels))
+batch_buffer = np.empty((batcher.max_batch, *IMAGE_SIZE, 3), dtype=np.float32)
+warm_up(model)
+warm_up(model, batcher.max_batch)
+startup["warmup_seconds"] = round(time.perf_counter() - started, 3)
+histogram("disease_model_warmup_seconds").record(startup["warmup_seconds"])
+print(f"Loaded {MODEL_PATH} ({len(class_labels)} classes) in {startup['load_seconds']}s, "
+      f"warmed up in {startup['warmup_seconds']}s")
+
+
+@app.before_request
+def begin_spans():
+    g.started = time.perf_counter()
+    g.spans = start_request_spans()
+
+
+@app.after_request
+def add_server_timing(response):
+    if SERVER_TIMING and "spans" in g:
+        total = ("total", time.perf_counter() - g.started)
+        response.headers["Server-Timing"] = server_timing(g.spans + [total])
+        response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    upload = request.files.get("image")
+    if upload is None:
+        return jsonify({"error": "expected a multipart upload in the 'image' field"}), 400
+    started = time.perf_counter()
+    try:
+        with span("image_decode"):
+            pixels = decode_image(upload.read())
+    except (OSError, ValueError, Image.DecompressionBombError):
+        # PIL's UnidentifiedImageError is an OSError; a small upload that
+        # would decode to an enormous image is a DecompressionBombError
+        return jsonify({"error": "could not decode the uploaded image"}), 400
+    key = dhash(pixels) if prediction_cache is not None else None
+    result = prediction_cache.get(key) if key is not None else None
+    if result is None:
+        try:
+            with span("disease_model"):
+                result = batcher.submit(pixels).result(timeout=PREDICT_TIMEOUT)
+        except (BatcherBusy, FutureTimeout):
+            return jsonify({"error": "the model is busy, try again shortly"}), 429
+        if key is not None:
+            prediction_cache.put(key, result)
+    histogram("disease_predict_seconds").record(time.perf_counter() - started)
+    return jsonify(result)
+
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    return jsonify({
+        "model": MODEL_PATH,
+        "classes": len(class_labels),
+        **startup,
+        "predict_seconds": histogram("disease_predict_seconds").summary(),
+        "image_decode_seconds": histogram("dependency_seconds", dependency="image_decode").summary(),
+        "inference_seconds": histogram("dependency_seconds", dependency="disease_model").summary(),
+        "batching": batcher.stats(),
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None,
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(prometheus_text(), mimetype="text/plain; version=0.0.4")
+
+if __name__ == "__main__":
+    app.run(port=int(os.environ.get("PORT", 5001)))
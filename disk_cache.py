@@ -0,0 +1,114 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+EVICTION_ORDER = {
+    "lru": "accessed_at DESC",
+    "lfu": "hits DESC, accessed_at DESC",
+}
+
+
+class DiskCache:
+    # Key/value cache persisted in a sqlite file so every worker process (and
+    # the next restart) shares the same entries. A small in-process LRU sits
+    # in front of sqlite so repeat lookups never leave memory; their access
+    # times and hit counts are written back in batches.
+
+    def __init__(self, path, table, max_entries=10000, ttl=86400, memory_entries=1024, policy="lru"):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.eviction_order = EVICTION_ORDER[policy]
+        self.memory = OrderedDict()
+        self.pending_hits = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+            "hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self.db.execute(f"PRAGMA table_info({table})")}
+        if "hits" not in columns:
+            self.db.execute(f"ALTER TABLE {table} ADD COLUMN hits INTEGER NOT NULL DEFAULT 0")
+        self.db.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)")
+
+    def _remember(self, key, value, stored_at):
+        self.memory[key] = (value, stored_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self.memory.move_to_end(key)
+                self.pending_hits[key] = self.pending_hits.get(key, 0) + 1
+                self.hits += 1
+                return entry[0]
+
+            row = self.db.execute(f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                self.memory.pop(key, None)
+                self.misses += 1
+                return None
+
+            self.db.execute(f"UPDATE {self.table} SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, accessed_at, hits) VALUES (?, ?, ?, ?, 0)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._remember(key, value, now)
+            self.writes += 1
+            # Trimming scans the access index, so only do it every few writes
+            if self.writes % 64 == 1:
+                self._evict(now)
+
+    def _flush_hits(self, now):
+        if self.pending_hits:
+            self.db.executemany(
+                f"UPDATE {self.table} SET accessed_at = ?, hits = hits + ? WHERE key = ?",
+                [(now, count, key) for key, count in self.pending_hits.items()],
+            )
+            self.pending_hits.clear()
+
+    def _evict(self, now):
+        self._flush_hits(now)
+        self.db.execute(f"DELETE FROM {self.table} WHERE stored_at < ?", (now - self.ttl,))
+        self.db.execute(
+            f"DELETE FROM {self.table} WHERE key IN "
+            f"(SELECT key FROM {self.table} ORDER BY {self.eviction_order} LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self),
+        }
@@ -0,0 +1,176 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from textnorm import normalize_prompt
+
+FAQ_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "faq.jsonl")
+
+ENGLISH_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "to", "of", "for", "in", "on", "at", "by", "with", "and", "or",
+    "my", "me", "i", "we", "our", "you", "your", "it", "this", "that", "do", "does", "can", "should", "what",
+    "which", "how", "much", "when", "where", "who", "will", "get", "about", "tell", "please",
+    # Generic in this corpus, and misleading when they are all that matches
+    "tamil", "nadu", "india", "farmer", "farming",
+}
+TAMIL_STOPWORDS = {"என்ன", "எப்படி", "எப்போது", "எங்கு", "எவ்வளவு", "யார்", "என்றால்", "செய்வது", "வேண்டும்"}
+# Tamil words carry case and plural suffixes (நெல் -> நெல்லுக்கு, நெல்லில்), so
+# each one is also indexed by its first few code points, a light prefix stem
+TAMIL_STEM_CHARS = 4
+
+
+def faq_terms(text):
+    terms = []
+    for word in normalize_prompt(text).split():
+        if word.isascii():
+            if word in ENGLISH_STOPWORDS:
+                continue
+            if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+                word = word[:-1]
+            terms.append(word)
+        elif word not in TAMIL_STOPWORDS:
+            terms.append(word)
+            if len(word) > TAMIL_STEM_CHARS:
+                terms.append("~" + word[:TAMIL_STEM_CHARS])
+    return terms
+
+
+class FaqIndex:
+    # BM25 over every phrasing of every question (English and Tamil alike),
+    # as an inverted index of precomputed per-document term weights, so a
+    # lookup only touches the postings of the query's own terms. An entry
+    # scores as its best-matching phrasing.
+
+    def __init__(self, entries, k1=1.2, b=0.75):
+        self.entries = entries
+        self.k1 = k1
+        self.b = b
+        self.doc_entry = []
+        documents = []
+        for entry_index, entry in enumerate(entries):
+            for questions in entry["questions"].values():
+                for question in questions:
+                    self.doc_entry.append(entry_index)
+                    documents.append(Counter(faq_terms(question)))
+
+        self.documents = len(documents)
+        self.avgdl = sum(sum(doc.values()) for doc in documents) / max(1, self.documents) or 1.0
+        frequencies = Counter(term for doc in documents for term in doc)
+        self.idf = {term: self.term_idf(count) for term, count in frequencies.items()}
+        self.unseen_idf = self.term_idf(0)
+        self.postings = defaultdict(list)
+        for doc_id, doc in enumerate(documents):
+            length = sum(doc.values())
+            for term, tf in doc.items():
+                self.postings[term].append((doc_id, self.idf[term] * self.saturate(tf, length)))
+
+    def term_idf(self, document_frequency):
+        return math.log(1 + (self.documents - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def saturate(self, tf, length):
+        return tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / self.avgdl))
+
+    def search(self, text, limit=3):
+        # Returns [(entry, score, confidence)], best first. Confidence is the
+        # score relative to a phrasing identical to the query, so it is
+        # comparable across short and long questions.
+        terms = Counter(faq_terms(text))
+        if not terms:
+            return []
+        length = sum(terms.values())
+        ideal = sum(self.idf.get(term, self.unseen_idf) * self.saturate(tf, length) for term, tf in terms.items())
+
+        doc_scores = defaultdict(float)
+        for term in terms:
+            for doc_id, weight in self.postings.get(term, ()):
+                doc_scores[doc_id] += weight
+        entry_scores = {}
+        for doc_id, score in doc_scores.items():
+            entry_index = self.doc_entry[doc_id]
+            entry_scores[entry_index] = max(score, entry_scores.get(entry_index, 0.0))
+        best = sorted(entry_scores.items(), key=lambda item: -item[1])[:limit]
+        return [(self.entries[index], score, min(1.0, score / ideal)) for index, score in best]
+
+
+def load_entries(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class FaqEngine:
+    # Answers questions from the FAQ corpus when the best match is confident
+    # enough. The corpus file is re-read when its mtime changes (checked at
+    # most every `check_interval` seconds); the new index is built aside and
+    # swapped in, and a broken file keeps the previous index.
+
+    def __init__(self, path=FAQ_PATH, min_confidence=0.65, min_score=5.0, check_interval=5.0):
+        self.path = path
+        self.min_confidence = min_confidence
+        self.min_score = min_score
+        self.check_interval = check_interval
+        self.index = FaqIndex([])
+        self.mtime = None
+        self.checked_at = time.monotonic()
+        self.reload_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.reload_errors = 0
+        self.reload()
+
+    def reload(self):
+        if not self.reload_lock.acquire(blocking=False):
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime != self.mtime:
+                # Recorded first, so a broken file is not re-parsed on every
+                # check, only once it changes again
+                self.mtime = mtime
+                self.index = FaqIndex(load_entries(self.path))
+                self.reloads += 1
+        except (OSError, ValueError, KeyError):
+            self.reload_errors += 1
+        finally:
+            self.reload_lock.release()
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self.checked_at >= self.check_interval:
+            self.checked_at = now
+            self.reload()
+
+    def answer(self, text, lang):
+        self.maybe_reload()
+        matches = self.index.search(text, limit=1)
+        if matches:
+            entry, score, confidence = matches[0]
+            if score >= self.min_score and confidence >= self.min_confidence:
+                self.hits += 1
+                return entry["answer"].get(lang) or entry["answer"]["en"]
+        self.misses += 1
+        return None
+
+    def stats(self):
+        index = self.index
+        return {
+            "entries": len(index.entries),
+            "questions": index.documents,
+            "terms": len(index.postings),
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+        }
+
+
+def faq_engine_from_env():
+    return FaqEngine(
+        os.environ.get("FAQ_PATH", FAQ_PATH),
+        min_confidence=float(os.environ.get("FAQ_MIN_CONFIDENCE", 0.65)),
+        min_score=float(os.environ.get("FAQ_MIN_SCORE", 5.0)),
+        check_interval=float(os.environ.get("FAQ_RELOAD_SECONDS", 5)),
+    )
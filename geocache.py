@@ -0,0 +1,63 @@
+import os
+
+from disk_cache import DiskCache
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat, lon, precision=7):
+    # Standard geohash: interleave longitude/latitude bisection bits, five per
+    # base32 character. Precision 7 is a ~150 m cell, 6 is ~1.2 km.
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        span = lon_range if even else lat_range
+        value = lon if even else lat
+        mid = (span[0] + span[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            span[0] = mid
+        else:
+            bits <<= 1
+            span[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+class GeoCache:
+    # Reverse-geocode results keyed by geohash cell, so nearby coordinates
+    # from the same village share one entry.
+
+    def __init__(self, path, precision=7, ttl=30 * 86400, max_entries=50000):
+        self.precision = precision
+        self.store = DiskCache(path, "reverse_geocode", max_entries=max_entries, ttl=ttl)
+
+    def key(self, lat, lon):
+        return geohash(float(lat), float(lon), self.precision)
+
+    def get(self, lat, lon):
+        return self.store.get(self.key(lat, lon))
+
+    def set(self, lat, lon, place):
+        self.store.set(self.key(lat, lon), place)
+
+    def stats(self):
+        return {"precision": self.precision, **self.store.stats()}
+
+
+def geocache_from_env():
+    return GeoCache(
+        os.environ.get("GEOCODE_CACHE_PATH", "geocode_cache.sqlite3"),
+        precision=int(os.environ.get("GEOCODE_PRECISION", 7)),
+        ttl=float(os.environ.get("GEOCODE_CACHE_TTL", 30 * 86400)),
+        max_entries=int(os.environ.get("GEOCODE_CACHE_SIZE", 50000)),
+    )
@@ -0,0 +1,229 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import histogram
+
+# Per-upstream (connect timeout, read timeout, max retries). Connect timeouts
+# sit just above a TCP retransmit window (3 s).
+UPSTREAMS = {
+    "nominatim": (3.05, 5, 1),
+    "wttr": (3.05, 5, 1),
+    "agmarknet": (5, 20, 2),
+    "openweathermap": (3.05, 10, 2),
+    "default": (3.05, 10, 0),
+}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Upstreams whose GETs may be hedged (idempotent, cheap to ask twice)
+HEDGED = {"nominatim", "wttr"}
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class RetryBudget:
+    # Token bucket: each request deposits `ratio` tokens and each retry spends
+    # one, so retries stay a bounded fraction of traffic when an upstream is
+    # failing instead of multiplying the load on it.
+
+    def __init__(self, ratio=0.2, reserve=5):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = float(reserve)
+        self.lock = threading.Lock()
+
+    def deposit(self):
+        with self.lock:
+            self.tokens = min(self.tokens + self.ratio, self.reserve)
+
+    def withdraw(self):
+        with self.lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class CircuitBreaker:
+    # Closed until `failures` calls in a row fail, then open: calls are
+    # rejected at once for `cooldown` seconds. After that one probe call is
+    # let through (half-open); its success closes the breaker, its failure
+    # opens it again.
+
+    def __init__(self, failures=5, cooldown=30.0):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+        self.opens = 0
+        self.rejected = 0
+
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def allow(self):
+        with self.lock:
+            state = self.state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.probing:
+                self.probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok):
+        with self.lock:
+            self.probing = False
+            if ok:
+                self.consecutive = 0
+                self.opened_at = None
+                return
+            self.consecutive += 1
+            # A failed probe re-opens the breaker, as does crossing the threshold
+            if self.opened_at is not None or self.consecutive >= self.failures:
+                if self.state() != "open":
+                    self.opens += 1
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self.lock:
+            return {"state": self.state(), "consecutive_failures": self.consecutive, "opens": self.opens, "rejected": self.rejected}
+
+
+class HttpClient:
+    # One pooled, keep-alive requests.Session shared by every upstream helper.
+    # urllib3 keeps a separate connection pool per host behind the adapter.
+
+    # Every upstream also gets a circuit breaker, and with hedging enabled a
+    # GET to a HEDGED upstream that has not answered within that host's p95
+    # latency is sent a second time; whichever response arrives first wins.
+
+    def __init__(self, upstreams=UPSTREAMS, pool_size=16, backoff=0.2, hedging=False, breaker_failures=5,
+                 breaker_cooldown=30.0, hedge_min_samples=20):
+        self.upstreams = upstreams
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(upstreams), pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.budgets = {name: RetryBudget() for name in upstreams}
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.breakers = {name: CircuitBreaker(breaker_failures, breaker_cooldown) for name in upstreams}
+        self.hedging = hedging
+        self.hedge_min_samples = hedge_min_samples
+        # Hedges are capped at ~10% extra requests, like retries
+        self.hedge_budgets = {name: RetryBudget(ratio=0.1) for name in HEDGED}
+        self.hedge_pool = ThreadPoolExecutor(max_workers=pool_size * 2, thread_name_prefix="http-hedge")
+        self.hedges = {name: 0 for name in HEDGED}
+        self.hedge_wins = {name: 0 for name in HEDGED}
+
+    def breaker(self, upstream):
+        found = self.breakers.get(upstream)
+        if found is None:
+            found = self.breakers.setdefault(upstream, CircuitBreaker(self.breaker_failures, self.breaker_cooldown))
+        return found
+
+    def request(self, upstream, method, url, **kwargs):
+        breaker = self.breaker(upstream)
+        if not breaker.allow():
+            raise CircuitOpen(f"{upstream} circuit is open")
+        try:
+            response = self._request(upstream, method, url, **kwargs)
+        except Exception:
+            breaker.record(False)
+            raise
+        breaker.record(response.status_code < 500)
+        return response
+
+    def _request(self, upstream, method, url, **kwargs):
+        connect_timeout, read_timeout, retries = self.upstreams.get(upstream, self.upstreams["default"])
+        kwargs.setdefault("timeout", (connect_timeout, read_timeout))
+        budget = self.budgets.setdefault(upstream, RetryBudget())
+        latency = histogram("http_request_seconds", host=urlsplit(url).netloc)
+        budget.deposit()
+        send = self._send
+        if self.hedging and method == "GET" and upstream in HEDGED:
+            send = self._send_hedged
+
+        attempt = 0
+        while True:
+            try:
+                response = send(upstream, latency, method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries or not budget.withdraw():
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= retries or not budget.withdraw():
+                    return response
+            attempt += 1
+            time.sleep(self.backoff * (2 ** (attempt - 1)))
+
+    def _send(self, upstream, latency, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            latency.record(time.perf_counter() - started)
+
+    def _send_hedged(self, upstream, latency, method, url, **kwargs):
+        budget = self.hedge_budgets[upstream]
+        budget.deposit()
+        first = self.hedge_pool.submit(self._send, upstream, latency, method, url, **kwargs)
+        if latency.count < self.hedge_min_samples:
+            return first.result()
+        done, _ = wait([first], timeout=latency.percentile(95))
+        if done or not budget.withdraw():
+            return first.result()
+
+        # The slower request is left to finish in the background; its
+        # connection goes back to the pool when it does.
+        self.hedges[upstream] += 1
+        second = self.hedge_pool.submit(self._send, upstream, latency, method, url, **kwargs)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = e
+                    continue
+                if future is second:
+                    self.hedge_wins[upstream] += 1
+                return response
+        raise error
+
+    def get(self, upstream, url, **kwargs):
+        return self.request(upstream, "GET", url, **kwargs)
+
+    def stats(self):
+        return {
+            name: {
+                "breaker": breaker.stats(),
+                **({"hedges": self.hedges[name], "hedge_wins": self.hedge_wins[name]} if name in HEDGED else {}),
+            }
+            for name, breaker in list(self.breakers.items())
+        }
+
+
+http = HttpClient(
+    pool_size=int(os.environ.get("HTTP_POOL_SIZE", 16)),
+    hedging=os.environ.get("HTTP_HEDGING", "0") == "1",
+    breaker_failures=int(os.environ.get("BREAKER_FAILURES", 5)),
+    breaker_cooldown=float(os.environ.get("BREAKER_COOLDOWN", 30)),
+)
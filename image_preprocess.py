@@ -0,0 +1,29 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+# Upload bytes -> model input without decoding phone photos at full size.
+# JPEG draft mode has libjpeg scale the DCT by 1/2, 1/4 or 1/8 while
+# decoding, to the smallest scale still at least IMAGE_SIZE, so a
+# 4000x3000 photo decodes straight to about 500x375. A bilinear resize
+# then covers the last step. Like keras load_img, the image is stretched
+# to IMAGE_SIZE, not cropped. Other formats decode normally.
+
+IMAGE_SIZE = (224, 224)
+SCALE = np.float32(1 / 255)
+
+
+def decode_image(data, out=None):
+    # Returns the (224, 224, 3) float32 array in [0, 1], written into `out`
+    # when given (e.g. one slot of a preallocated batch buffer)
+    with Image.open(io.BytesIO(data)) as img:
+        img.draft("RGB", IMAGE_SIZE)
+        img = img.convert("RGB")
+        if img.size != IMAGE_SIZE:
+            img = img.resize(IMAGE_SIZE, Image.BILINEAR)
+    if out is None:
+        out = np.empty((*IMAGE_SIZE[::-1], 3), dtype=np.float32)
+    np.multiply(np.asarray(img), SCALE, out=out)
+    return out
+
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+from collections import deque
+
+import numpy as np
+
+from crop_search import CROP_ALIASES
+from textnorm import normalize_prompt
+
+INTENTS = ("weather", "market", "disease", "irrigation", "scheme", "chat")
+
+# English and Tamil trigger phrases. English phrases must match whole words;
+# Tamil phrases may carry case suffixes (மழைக்கு, நோயை), so they only need
+# to start on a word boundary.
+INTENT_PHRASES = {
+    "weather": [
+        "weather", "forecast", "will it rain", "rain today", "rain tomorrow", "rainfall", "temperature",
+        "humidity", "monsoon", "cyclone",
+        "வானிலை", "மழை", "வெப்பநிலை", "ஈரப்பதம்", "பருவமழை", "புயல்",
+    ],
+    "market": [
+        "market price", "market rate", "mandi", "price", "prices", "price of", "selling price", "msp",
+        "சந்தை விலை", "சந்தை", "விலை", "மண்டி",
+    ],
+    "disease": [
+        "disease", "pest", "pests", "blight", "blast", "leaf spot", "root rot", "fruit rot", "wilt", "insect",
+        "fungus", "fungal", "infection", "yellow leaves", "yellowing", "turning yellow", "borer", "mites",
+        "virus", "aphids", "whitefly", "bunchy top", "rust", "mildew", "deficiency",
+        "நோய்", "பூச்சி", "குலை நோய்", "கருகல்", "அழுகல்", "வாடல்", "துரு", "மஞ்சள் நிற இலை",
+    ],
+    "irrigation": [
+        "irrigation", "irrigate", "water requirement", "how much water", "watering", "water need",
+        "water for", "drip", "sprinkler",
+        "பாசனம்", "நீர்ப்பாசனம்", "தண்ணீர்", "சொட்டு நீர்", "நீர் தேவை",
+    ],
+    "scheme": [
+        "scheme", "schemes", "subsidy", "pm kisan", "pmkisan", "pmfby", "crop insurance", "insurance",
+        "loan", "kisan credit card", "kcc", "government", "govt", "eligibility", "eligible",
+        "திட்டம்", "திட்டத்", "திட்டங்கள்", "மானியம்", "காப்பீடு", "கடன்", "அரசு", "பிஎம் கிசான்", "கிசான்",
+        "தகுதி",
+    ],
+}
+
+# Ambiguous on their own ("rate of fertilizer", "rot", "before the rain")
+# and left out: the classifier and the LLM handle those messages.
+
+# A subsidy or insurance question mentioning drip irrigation or rain damage
+# is still a scheme question
+INTENT_WEIGHTS = {"scheme": 3.0}
+
+# Intents answered with canned text (or a bare weather report) rather than
+# the LLM. Those answers only fit short, generic questions, so a message with
+# more than `max_extra_words` words beyond its trigger phrases, crop names
+# and the words below goes to the LLM instead ("explain integrated pest
+# management for cotton", "should i sow paddy before the rain").
+CANNED_INTENTS = ("weather", "disease", "irrigation", "scheme")
+GENERIC_WORDS = {
+    "a", "an", "the", "is", "are", "am", "was", "be", "to", "of", "for", "in", "on", "at", "by", "with", "and", "or",
+    "my", "me", "i", "we", "our", "you", "your", "it", "its", "this", "that", "these", "do", "does", "can",
+    "could", "should", "what", "which", "how", "why", "much", "many", "when", "where", "who", "will", "would",
+    "there", "any", "get", "about", "tell", "please", "give", "like", "here", "now", "today", "tomorrow",
+    "tonight", "week", "weekend", "morning", "evening", "next", "current", "per", "day", "daily", "rain",
+    "need", "needs", "needed", "required", "crop", "crops", "plant", "plants", "tree", "trees", "leaf", "leaves",
+    "field", "farm", "farmer", "farmers", "tamil", "nadu", "control", "manage", "treat", "prevent", "apply", "details",
+}
+# Tamil words carry suffixes, so these match as word prefixes
+GENERIC_TAMIL_PREFIXES = (
+    "என்ன", "எப்படி", "எப்போது", "எங்கு", "எவ்வளவு", "எந்த", "யார்", "இன்று", "இன்றைய", "நாளை", "தேவை",
+    "பயிர", "இலை", "கட்டுப்", "விவசாயி", "வேண்டும்",
+)
+CROP_WORDS = {word for names in CROP_ALIASES.values() for name in names for word in normalize_prompt(name).split()}
+CROP_TAMIL_PREFIXES = tuple(word for word in CROP_WORDS if not word.isascii())
+
+# Tamil stems drop a final pulli or -u before a vowel suffix (நோய் -> நோயை,
+# காப்பீடு -> காப்பீட்டுக்கு), so those phrases are also matched without it
+TAMIL_STEM_ENDINGS = ("\u0bcd", "\u0bc1")
+
+
+def phrase_patterns(phrase):
+    phrase = normalize_prompt(phrase)
+    yield phrase
+    if not phrase.isascii() and phrase.endswith(TAMIL_STEM_ENDINGS) and len(phrase) > 3:
+        yield phrase[:-1]
+
+
+class AhoCorasick:
+    # Multi-pattern matcher: one pass over the text finds every phrase of
+    # every intent, however many phrases there are.
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern, value in patterns:
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append((len(pattern), value))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def matches(self, text):
+        # Yields (start, end, value) for every occurrence
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, value in self.output[state]:
+                yield index + 1 - length, index + 1, value
+
+
+def hashed_features(text, dim):
+    # Word unigrams and bigrams plus character trigrams, hashed into `dim`
+    # buckets; returns the active bucket indices.
+    words = text.split()
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return [int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest(), "little") % dim for gram in grams]
+
+
+class IntentClassifier:
+    # Softmax regression over hashed n-grams, trained with full-batch
+    # gradient descent at startup (the example file is small).
+
+    def __init__(self, dim=4096):
+        self.dim = dim
+        self.weights = np.zeros((dim, len(INTENTS)), dtype=np.float32)
+        self.bias = np.zeros(len(INTENTS), dtype=np.float32)
+
+    def vectorize(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for index in hashed_features(text, self.dim):
+                matrix[row, index] += 1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-6)
+
+    def fit(self, texts, labels, epochs=300, learning_rate=2.0, l2=1e-4):
+        features = self.vectorize([normalize_prompt(text) for text in texts])
+        targets = np.zeros((len(labels), len(INTENTS)), dtype=np.float32)
+        targets[np.arange(len(labels)), [INTENTS.index(label) for label in labels]] = 1.0
+        for _ in range(epochs):
+            probabilities = self.softmax(features @ self.weights + self.bias)
+            error = (probabilities - targets) / len(labels)
+            self.weights -= learning_rate * (features.T @ error + l2 * self.weights)
+            self.bias -= learning_rate * error.sum(axis=0)
+        return self
+
+    @staticmethod
+    def softmax(logits):
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def predict(self, normalized_text):
+        # Sparse dot product: only the active rows of the weight matrix
+        indices = hashed_features(normalized_text, self.dim)
+        if not indices:
+            return "chat", 0.0
+        counts = np.bincount(indices, minlength=0)
+        active = np.nonzero(counts)[0]
+        values = counts[active].astype(np.float32)
+        values /= np.linalg.norm(values)
+        probabilities = self.softmax(values @ self.weights[active] + self.bias)
+        best = int(np.argmax(probabilities))
+        return INTENTS[best], float(probabilities[best])
+
+
+def is_crop(word):
+    return word in CROP_WORDS if word.isascii() else word.startswith(CROP_TAMIL_PREFIXES)
+
+
+def names_crop(text):
+    return any(is_crop(word) for word in text.split())
+
+
+def is_generic(word):
+    if word.isascii():
+        return word in GENERIC_WORDS or is_crop(word)
+    return word.startswith(GENERIC_TAMIL_PREFIXES) or is_crop(word)
+
+
+class IntentRouter:
+    def __init__(self, phrases=INTENT_PHRASES, classifier=None, threshold=0.6, max_extra_words=1):
+        patterns = [
+            (pattern, intent)
+            for intent, items in phrases.items()
+            for phrase in items
+            for pattern in phrase_patterns(phrase)
+        ]
+        self.automaton = AhoCorasick(patterns)
+        self.classifier = classifier
+        self.threshold = threshold
+        self.max_extra_words = max_extra_words
+
+    def keyword_matches(self, text):
+        # (start, end, intent) of every whole-word phrase occurrence
+        for start, end, intent in self.automaton.matches(text):
+            if start > 0 and text[start - 1] != " ":
+                continue
+            if text[start].isascii() and end < len(text) and text[end] != " ":
+                continue
+            yield start, end, intent
+
+    def keyword_scores(self, text, matches=None):
+        scores = {}
+        for start, end, intent in self.keyword_matches(text) if matches is None else matches:
+            # Longer phrases are more specific ("market price" over "price")
+            scores[intent] = scores.get(intent, 0) + (end - start) * INTENT_WEIGHTS.get(intent, 1.0)
+        return scores
+
+    def extra_words(self, text, matches):
+        # Words outside every matched phrase that are not generic or a crop
+        covered = set()
+        for start, end, _ in matches:
+            covered.update(range(start, end))
+        extra = []
+        position = 0
+        for word in text.split(" "):
+            if position not in covered and not is_generic(word):
+                extra.append(word)
+            position += len(word) + 1
+        return extra
+
+    def topic(self, text, matches):
+        # Returns (intent, confidence, source) where source says which stage
+        # decided: "keywords", "classifier" or "default" (LLM fallback). A
+        # market question has to name a crop to be priced.
+        scores = self.keyword_scores(text, matches)
+        if "market" in scores and not names_crop(text):
+            del scores["market"]
+        if scores:
+            intent = max(scores, key=scores.get)
+            return intent, scores[intent] / sum(scores.values()), "keywords"
+        if self.classifier is not None:
+            intent, probability = self.classifier.predict(text)
+            if probability >= self.threshold and (intent != "market" or names_crop(text)):
+                return intent, probability, "classifier"
+        return "chat", 1.0, "default"
+
+    def route(self, message):
+        # Like topic(), but canned intents of specific questions go to the
+        # LLM, with source "specific"
+        text = normalize_prompt(message)
+        matches = list(self.keyword_matches(text))
+        intent, confidence, source = self.topic(text, matches)
+        if intent in CANNED_INTENTS and len(self.extra_words(text, matches)) > self.max_extra_words:
+            return "chat", confidence, "specific"
+        return intent, confidence, source
+
+
+def load_examples(path):
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [row["text"] for row in rows], [row["intent"] for row in rows]
+
+
+EXAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "intent_examples.jsonl")
+
+
+def intent_router_from_env():
+    classifier = None
+    path = os.environ.get("INTENT_EXAMPLES", EXAMPLES_PATH)
+    if os.path.exists(path):
+        classifier = IntentClassifier().fit(*load_examples(path))
+    return IntentRouter(
+        classifier=classifier,
+        threshold=float(os.environ.get("INTENT_THRESHOLD", 0.6)),
+        max_extra_words=int(os.environ.get("INTENT_MAX_EXTRA_WORDS", 1)),
+    )
@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+from crop_search import CropIndex
+from metrics import span
+
+
+class MarketSnapshot:
+    # Immutable view of one ingest: crop -> mandi -> (commodity, price, date),
+    # where date is an ordinal (0 when the table has no usable date).
+    # Readers grab the current snapshot reference and never take a lock.
+
+    def __init__(self, prices, fetched_at):
+        self.prices = prices
+        self.fetched_at = fetched_at
+        self.index = CropIndex(prices.keys())
+
+    def __len__(self):
+        return len(self.prices)
+
+    def latest(self, key):
+        # Most recent report wins when several mandis quote the crop
+        mandi, (commodity, price, date) = max(self.prices[key].items(), key=lambda item: item[1][2])
+        return commodity, mandi, price
+
+    def search(self, text, limit=5):
+        # Ranked (commodity, mandi, price) candidates for a crop mention
+        return [self.latest(key) for key, score in self.index.search(text, limit)]
+
+    def lookup(self, text):
+        candidates = self.search(text, limit=1)
+        return candidates[0] if candidates else None
+
+
+EMPTY_SNAPSHOT = MarketSnapshot({}, 0.0)
+DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%d %b %Y", "%d-%b-%Y", "%Y-%m-%d")
+
+
+def date_ordinal(text):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).toordinal()
+        except ValueError:
+            continue
+    return 0
+
+
+def find_column(headers, *names):
+    # Names in priority order: every header is tried for the first name
+    # before any for the next, so "modal price" beats an earlier "min price"
+    for name in names:
+        for index, header in enumerate(headers):
+            if name in header:
+                return index
+    return None
+
+
+def parse_price_tables(html):
+    soup = BeautifulSoup(html, "html.parser")
+    prices = {}
+    for table in soup.find_all("table"):
+        rows = table.find_all("tr")
+        if not rows:
+            continue
+        headers = [cell.get_text(strip=True).lower() for cell in rows[0].find_all(["th", "td"])]
+        commodity_col = find_column(headers, "commodity", "crop")
+        price_col = find_column(headers, "modal price", "price")
+        market_col = find_column(headers, "market", "mandi")
+        date_col = find_column(headers, "date")
+        if commodity_col is None:
+            commodity_col = 0
+        if price_col is None:
+            price_col = 1
+
+        for row in rows[1:]:
+            columns = [cell.get_text(strip=True) for cell in row.find_all("td")]
+            if len(columns) <= max(commodity_col, price_col):
+                continue
+            commodity = columns[commodity_col]
+            mandi = columns[market_col] if market_col is not None and market_col < len(columns) else ""
+            date = date_ordinal(columns[date_col]) if date_col is not None and date_col < len(columns) else 0
+            if not commodity:
+                continue
+            mandis = prices.setdefault(commodity.lower(), {})
+            if mandi not in mandis or date >= mandis[mandi][2]:
+                mandis[mandi] = (commodity, columns[price_col], date)
+    return prices
+
+
+class MarketIngester:
+    # Fetches and parses the agmarknet price tables on a fixed interval in a
+    # daemon thread, publishing each result as a new snapshot.
+
+    def __init__(self, fetch_html, interval=1800):
+        self.fetch_html = fetch_html
+        self.interval = interval
+        self.snapshot = EMPTY_SNAPSHOT
+        self.stopped = threading.Event()
+        self.thread = None
+        self.ingests = 0
+        self.errors = 0
+        self.last_ingest_seconds = 0.0
+
+    def ingest_once(self):
+        started = time.monotonic()
+        try:
+            with span("agmarknet_fetch"):
+                html = self.fetch_html()
+            with span("market_parse"):
+                prices = parse_price_tables(html)
+        except Exception:
+            self.errors += 1
+            return False
+        if not prices:
+            # Keep serving the previous snapshot if the page layout broke
+            self.errors += 1
+            return False
+        self.snapshot = MarketSnapshot(prices, time.time())
+        self.ingests += 1
+        self.last_ingest_seconds = time.monotonic() - started
+        return True
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.ingest_once()
+            self.stopped.wait(self.interval)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="market-ingester", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            "crops": len(snapshot),
+            "snapshot_age_seconds": round(time.time() - snapshot.fetched_at, 1) if snapshot.fetched_at else None,
+            "ingests": self.ingests,
+            "errors": self.errors,
+            "last_ingest_seconds": round(self.last_ingest_seconds, 4),
+        }
+
+
+def market_ingester_from_env(fetch_html):
+    return MarketIngester(fetch_html, interval=float(os.environ.get("MARKET_REFRESH_SECONDS", 1800)))
@@ -0,0 +1,201 @@
+import contextvars
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# HDR-style latency histograms: values are bucketed on a log-linear scale
+# (SUB_BUCKETS linear steps per power of two), so recording is O(1), memory is
+# fixed, and percentiles keep a bounded relative error (~1/SUB_BUCKETS).
+SUB_BUCKETS = 16
+MIN_VALUE = 1e-6  # 1 microsecond
+MAX_OCTAVES = 32
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (SUB_BUCKETS * MAX_OCTAVES)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def bucket(value):
+        scaled = max(value / MIN_VALUE, 1.0)
+        octave = min(int(math.log2(scaled)), MAX_OCTAVES - 1)
+        step = int((scaled / (1 << octave) - 1.0) * SUB_BUCKETS)
+        return octave * SUB_BUCKETS + min(step, SUB_BUCKETS - 1)
+
+    @staticmethod
+    def upper_bound(index):
+        octave, step = divmod(index, SUB_BUCKETS)
+        return MIN_VALUE * (1 << octave) * (1.0 + (step + 1) / SUB_BUCKETS)
+
+    def record(self, value):
+        index = self.bucket(value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, pct):
+        with self.lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, math.ceil(self.count * pct / 100))
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def cumulative(self, bounds):
+        # Count of values <= each bound, for Prometheus `le` buckets. A bound
+        # that falls inside an HDR bucket counts that bucket only once its
+        # upper edge is below the bound, so counts err slightly low.
+        with self.lock:
+            counts = list(self.counts)
+        result = []
+        seen = 0
+        index = 0
+        for bound in bounds:
+            while index < len(counts) and self.upper_bound(index) <= bound:
+                seen += counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 6) if self.count else 0.0,
+            "p50": round(self.percentile(50), 6),
+            "p95": round(self.percentile(95), 6),
+            "p99": round(self.percentile(99), 6),
+            "max": round(self.max, 6),
+        }
+
+
+def percentile(samples, pct):
+    # Nearest-rank percentile of raw samples, the rank Histogram.percentile
+    # uses, so the bench scripts and /stats report comparable figures
+    ordered = sorted(samples)
+    return ordered[min(len(ordered), max(1, math.ceil(len(ordered) * pct / 100))) - 1]
+
+
+def latency_ms(samples, pcts=(50, 95, 99), digits=2):
+    # Mean, percentiles and max of samples in seconds, in milliseconds
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    summary = {"mean": round(sum(ordered) / len(ordered) * 1000, digits)}
+    for pct in pcts:
+        summary[f"p{pct}"] = round(percentile(ordered, pct) * 1000, digits)
+    summary["max"] = round(ordered[-1] * 1000, digits)
+    return summary
+
+
+histograms = {}
+histograms_lock = threading.Lock()
+
+
+def histogram(name, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    found = histograms.get(key)
+    if found is None:
+        with histograms_lock:
+            found = histograms.setdefault(key, Histogram())
+    return found
+
+
+def histogram_summaries(name):
+    # {label values: summary} for every histogram registered under name
+    return {
+        ",".join(str(value) for _, value in labels): found.summary()
+        for (hist_name, labels), found in list(histograms.items())
+        if hist_name == name
+    }
+
+
+# Dependency spans: every span lands in the dependency_seconds histogram, and
+# also in the current request's span list when one was started, which is how
+# the Server-Timing header is built. app.run_blocking copies the context, so
+# spans inside worker threads still reach the request's list.
+current_spans = contextvars.ContextVar("current_spans", default=None)
+
+
+def start_request_spans():
+    spans = []
+    current_spans.set(spans)
+    return spans
+
+
+@contextmanager
+def span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        histogram("dependency_seconds", dependency=name).record(elapsed)
+        spans = current_spans.get()
+        if spans is not None:
+            spans.append((name, elapsed))
+
+
+def server_timing(spans):
+    # Server-Timing header value; repeated spans of one dependency are summed
+    totals = {}
+    for name, elapsed in spans:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in totals.items())
+
+
+# Prometheus text exposition. Histograms whose name ends in _seconds are
+# exported as histograms over LATENCY_BUCKETS; anything else (tokens/sec) as
+# a summary with precomputed quantiles.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = "vivas_"
+
+
+def label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def label_text(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{label_value(value)}"' for key, value in pairs) + "}"
+
+
+def prometheus_text():
+    by_name = {}
+    for (name, labels), found in sorted(list(histograms.items()), key=lambda item: item[0]):
+        by_name.setdefault(name, []).append((labels, found))
+
+    lines = []
+    for name, series in by_name.items():
+        metric = METRIC_PREFIX + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+        if name.endswith("_seconds"):
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, found in series:
+                for bound, count in zip(LATENCY_BUCKETS, found.cumulative(LATENCY_BUCKETS)):
+                    lines.append(f"{metric}_bucket{label_text(labels, le=bound)} {count}")
+                lines.append(f'{metric}_bucket{label_text(labels, le="+Inf")} {found.count}')
+                lines.append(f"{metric}_sum{label_text(labels)} {found.total}")
+                lines.append(f"{metric}_count{label_text(labels)} {found.count}")
+        else:
+            lines.append(f"# TYPE {metric} summary")
+            for labels, found in series:
+                for quantile in QUANTILES:
+                    lines.append(f"{metric}{label_text(labels, quantile=quantile)} {found.percentile(quantile * 100)}")
+                lines.append(f"{metric}_sum{label_text(labels)} {found.total}")
+                lines.append(f"{metric}_count{label_text(labels)} {found.count}")
+    return "\n".join(lines) + "\n"
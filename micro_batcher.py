@@ -0,0 +1,104 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import histogram
+
+
+class BatcherBusy(Exception):
+    pass
+
+
+class MicroBatcher:
+    # Collects concurrent single-item requests into batches for one worker
+    # thread: a batch closes when it holds `max_batch` items or `max_wait`
+    # seconds after its first item arrived, whichever comes first, so a lone
+    # request waits at most max_wait while a burst fills whole batches.
+    # `run_batch(items)` returns one result per item, in order.
+
+    def __init__(self, run_batch, max_batch=16, max_wait=0.005, max_queue=256, name="micro-batcher"):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.failed_batches = 0
+        self.batch_sizes = histogram("micro_batch_size", batcher=name)
+        self.wait_seconds = histogram("micro_batch_wait_seconds", batcher=name)
+        self.run_seconds = histogram("micro_batch_run_seconds", batcher=name)
+        threading.Thread(target=self._work, name=name, daemon=True).start()
+
+    def submit(self, item):
+        future = Future()
+        try:
+            self.queue.put_nowait((item, future, time.monotonic()))
+        except queue.Full:
+            with self.lock:
+                self.rejected += 1
+            raise BatcherBusy("batch queue is full")
+        return future
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                # Whatever is already queued joins even past the deadline
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            for _, _, queued_at in batch:
+                self.wait_seconds.record(started - queued_at)
+            try:
+                results = self.run_batch([item for item, _, _ in batch])
+            except Exception as e:
+                with self.lock:
+                    self.failed_batches += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            self.run_seconds.record(time.monotonic() - started)
+            self.batch_sizes.record(len(batch))
+            with self.lock:
+                self.batches += 1
+                self.items += len(batch)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "queue_depth": self.queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "rejected": self.rejected,
+                "failed_batches": self.failed_batches,
+                "batch_size": self.batch_sizes.summary(),
+                "wait_seconds": self.wait_seconds.summary(),
+                "run_seconds": self.run_seconds.summary(),
+            }
+
+
+def micro_batcher_from_env(run_batch, name="disease"):
+    return MicroBatcher(
+        run_batch,
+        max_batch=int(os.environ.get("DISEASE_MAX_BATCH", 16)),
+        max_wait=float(os.environ.get("DISEASE_MAX_WAIT_MS", 5)) / 1000,
+        max_queue=int(os.environ.get("DISEASE_MAX_QUEUE", 256)),
+        name=name,
+    )
@@ -0,0 +1,66 @@
+import json
+import logging
+import os
+import re
+
+from textnorm import normalize_prompt
+
+logger = logging.getLogger("vivas.model_router")
+
+# Words that signal a question needs reasoning or a long answer
+COMPLEX_MARKERS = {
+    "why", "explain", "compare", "difference", "between", "plan", "schedule", "steps", "calculate",
+    "integrated", "management", "detailed", "versus", "vs",
+    "ஏன்", "விளக்கு", "விளக்கவும்", "ஒப்பிடு", "வேறுபாடு", "திட்டமிடு", "படிகள்", "விரிவாக",
+}
+SENTENCE_END = re.compile(r"[.?!।]+")
+
+
+class ModelTier:
+    def __init__(self, name, model, max_words=None, max_complexity=None):
+        self.name = name
+        self.model = model
+        self.max_words = max_words
+        self.max_complexity = max_complexity
+
+    def accepts(self, words, complexity):
+        return (self.max_words is None or words <= self.max_words) and (
+            self.max_complexity is None or complexity <= self.max_complexity
+        )
+
+
+def prompt_complexity(prompt):
+    # Rough score: one point per reasoning marker, per extra sentence or
+    # question, and per 25 words of length
+    words = normalize_prompt(prompt).split()
+    sentences = max(1, len([part for part in SENTENCE_END.split(prompt) if part.strip()]))
+    markers = sum(1 for word in words if word in COMPLEX_MARKERS)
+    return markers + (sentences - 1) + len(words) / 25
+
+
+class ModelRouter:
+    # Picks the first tier (ordered small to large) that accepts the prompt;
+    # the last tier takes everything else. Each decision is logged at INFO
+    # on `logger` (app.py passes the Flask app's).
+
+    def __init__(self, tiers, logger=logger):
+        self.tiers = tiers
+        self.logger = logger
+
+    def choose(self, prompt):
+        words = len(prompt.split())
+        complexity = prompt_complexity(prompt)
+        tier = next((tier for tier in self.tiers[:-1] if tier.accepts(words, complexity)), self.tiers[-1])
+        self.logger.info("model tier=%s model=%s words=%d complexity=%.2f", tier.name, tier.model, words, complexity)
+        return tier
+
+
+def model_router_from_env(default_model, logger=logger):
+    # LLM_MODEL_TIERS is a JSON list, smallest first, e.g.
+    # [{"name": "small", "model": "qwen2.5:1.5b-instruct-q4_K_M", "max_words": 12, "max_complexity": 1},
+    #  {"name": "large", "model": "mistral"}]
+    # Without it every prompt goes to the single default model.
+    raw = os.environ.get("LLM_MODEL_TIERS")
+    if not raw:
+        return ModelRouter([ModelTier("default", default_model)], logger)
+    return ModelRouter([ModelTier(**tier) for tier in json.loads(raw)], logger)
@@ -4,9 +4,10 @@ import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import LabelEncoder
-import requests
 from datetime import datetime
 
+from http_client import http
+
 # 🔹 Define model path
 model_path = "water_prediction_model.pkl"
 encoder_path = "label_encoders.pkl"
@@ -127,7 +128,7 @@ crop_water_need = default_crop_water.get(crop, 6)
 
 # 🔹 Get latitude and longitude for the city
 geo_url = f"https://api.openweathermap.org/geo/1.0/direct?q={city}&limit=1&appid={API_KEY}"
-geo_response = requests.get(geo_url).json()
+geo_response = http.get("openweathermap", geo_url).json()
 
 if not geo_response:
     print(f"\n🚨 Error: City '{city}' not found.")
@@ -137,7 +138,7 @@ lat, lon = geo_response[0]["lat"], geo_response[0]["lon"]
 
 # 🔹 Fetch 5-day weather forecast
 forecast_url = f"https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={API_KEY}&units=metric"
-forecast_response = requests.get(forecast_url).json()
+forecast_response = http.get("openweathermap", forecast_url).json()
 
 if forecast_response.get("cod") != "200":
     print(f"\n🚨 Error: {forecast_response.get('message', 'Invalid city name')}")
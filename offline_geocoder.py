@@ -0,0 +1,81 @@
+import csv
+import os
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tn_gazetteer.csv")
+KINDS = ("village", "taluk", "district")
+
+
+class OfflineGeocoder:
+    # Nearest-place lookups against a local gazetteer (columns: name, kind,
+    # district, lat, lon). Coordinates are kept as one float64 radians array
+    # under a haversine ball tree; names are interned into small arrays.
+    # The bundled gazetteer only has district and taluk headquarters, so a
+    # point is only named offline when it lies within a few km of one; the
+    # rest fall through to the geohash cache and Nominatim.
+
+    def __init__(self, path=GAZETTEER_PATH, max_km=5.0):
+        names, kinds, districts, coords = [], [], [], []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                names.append(row["name"])
+                kinds.append(KINDS.index(row["kind"]))
+                districts.append(row["district"])
+                coords.append((float(row["lat"]), float(row["lon"])))
+
+        self.names = np.array(names, dtype=object)
+        self.kinds = np.array(kinds, dtype=np.int8)
+        self.districts = np.array(districts, dtype=object)
+        self.coords = np.radians(np.array(coords, dtype=np.float64))
+        self.tree = BallTree(self.coords, metric="haversine")
+        self.max_km = max_km
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def display_name(self, index):
+        # Only a village match names its district: near a town the point may
+        # well lie across a district boundary
+        name, district = self.names[index], self.districts[index]
+        if self.kinds[index] != KINDS.index("village"):
+            return f"{name}, Tamil Nadu, India"
+        return f"{name}, {district} District, Tamil Nadu, India"
+
+    def nearest_many(self, coords):
+        # coords: (N, 2) array-like of lat/lon degrees. Returns place indices
+        # and distances in km for the whole batch in one tree query.
+        points = np.radians(np.asarray(coords, dtype=np.float64).reshape(-1, 2))
+        distances, indices = self.tree.query(points, k=1)
+        return indices[:, 0], distances[:, 0] * EARTH_RADIUS_KM
+
+    def lookup_many(self, coords):
+        # Display names for a batch of coordinates, None where the nearest
+        # gazetteer place is further than max_km.
+        indices, distances_km = self.nearest_many(coords)
+        return [
+            self.display_name(i) if d <= self.max_km else None
+            for i, d in zip(indices, distances_km)
+        ]
+
+    def lookup(self, lat, lon):
+        place = self.lookup_many([(lat, lon)])[0]
+        if place is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return place
+
+    def stats(self):
+        return {"places": len(self), "max_km": self.max_km, "hits": self.hits, "misses": self.misses}
+
+
+def offline_geocoder_from_env():
+    return OfflineGeocoder(
+        os.environ.get("OFFLINE_GAZETTEER", GAZETTEER_PATH),
+        max_km=float(os.environ.get("OFFLINE_GEOCODE_MAX_KM", 5)),
+    )
@@ -0,0 +1,149 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+# Disease predictions remembered by perceptual hash, so a resent photo or a
+# near-identical burst shot skips the forward pass. The hash is a 64-bit
+# dHash of the already decoded 224px model input: brightness gradients
+# between neighbouring cells of a 9x8 grayscale thumbnail, which survive
+# recompression, small shifts and exposure changes, but not a different leaf.
+
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def dhash(pixels):
+    # pixels: (224, 224, 3) float32 in [0, 1], as decode_image returns them
+    gray = Image.fromarray((pixels @ LUMA * 255).astype(np.uint8))
+    cells = np.asarray(gray.resize((9, 8), Image.BOX), dtype=np.int16)
+    bits = (cells[:, 1:] > cells[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    # Burkhard-Keller tree over Hamming distance: each child sits under the
+    # edge labelled with its distance to the parent, so by the triangle
+    # inequality a search within `radius` of the query only needs the
+    # edges from d - radius to d + radius.
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, key):
+        self.size += 1
+        if self.root is None:
+            self.root = (key, {})
+            return
+        node = self.root
+        while True:
+            distance = hamming(key, node[0])
+            if distance == 0:
+                self.size -= 1
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (key, {})
+                return
+            node = child
+
+    def nearest(self, key, radius, accept):
+        # (distance, key) of the closest key within radius that accept(key)
+        # allows, or None
+        best = None
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_key, children = stack.pop()
+            distance = hamming(key, node_key)
+            if distance <= radius and accept(node_key) and (best is None or distance < best[0]):
+                best = (distance, node_key)
+                if distance == 0:
+                    break
+                radius = distance - 1
+            for edge, child in children.items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return best
+
+
+class PredictionCache:
+    # At most `max_entries` predictions, least recently used evicted first.
+    # BK-trees cannot delete, so evicted hashes stay in the tree (lookups
+    # skip them) until it holds twice the live entries and is rebuilt.
+
+    def __init__(self, max_entries=10000, max_distance=4):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.entries = OrderedDict()
+        self.tree = BKTree()
+        self.lock = threading.Lock()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rebuilds = 0
+
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.exact_hits += 1
+            else:
+                found = self.tree.nearest(key, self.max_distance, self.entries.__contains__)
+                if found is None:
+                    self.misses += 1
+                    return None
+                key = found[1]
+                result = self.entries[key]
+                self.near_hits += 1
+            self.entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.entries[key] = result
+                return
+            self.entries[key] = result
+            self.tree.add(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            if self.tree.size > 2 * max(1, len(self.entries)):
+                self.tree = BKTree()
+                for live in self.entries:
+                    self.tree.add(live)
+                self.rebuilds += 1
+
+    def stats(self):
+        with self.lock:
+            hits = self.exact_hits + self.near_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "max_distance": self.max_distance,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "tree_size": self.tree.size,
+                "rebuilds": self.rebuilds,
+            }
+
+
+def prediction_cache_from_env():
+    if os.environ.get("DISEASE_CACHE", "1") != "1":
+        return None
+    return PredictionCache(
+        max_entries=int(os.environ.get("DISEASE_CACHE_ENTRIES", 10000)),
+        max_distance=int(os.environ.get("DISEASE_CACHE_DISTANCE", 4)),
+    )
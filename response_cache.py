@@ -0,0 +1,38 @@
+import hashlib
+import os
+
+from disk_cache import DiskCache
+from textnorm import normalize_prompt
+
+
+class ResponseCache:
+    # Exact-match cache of LLM answers. Keys are the normalized prompt plus
+    # language and model, so "Best fertilizer for paddy?" and "best
+    # fertilizer for  paddy" share an entry, but an English and a Tamil
+    # answer, or answers from two models, never collide.
+
+    def __init__(self, path, max_entries=20000, ttl=7 * 86400, policy="lfu"):
+        self.store = DiskCache(path, "llm_responses", max_entries=max_entries, ttl=ttl, policy=policy)
+
+    @staticmethod
+    def key(prompt, lang, model):
+        raw = "\x1f".join((model, lang, normalize_prompt(prompt)))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, prompt, lang, model):
+        return self.store.get(self.key(prompt, lang, model))
+
+    def set(self, prompt, lang, model, reply):
+        self.store.set(self.key(prompt, lang, model), reply)
+
+    def stats(self):
+        return self.store.stats()
+
+
+def response_cache_from_env():
+    return ResponseCache(
+        os.environ.get("RESPONSE_CACHE_PATH", "response_cache.sqlite3"),
+        max_entries=int(os.environ.get("RESPONSE_CACHE_SIZE", 20000)),
+        ttl=float(os.environ.get("RESPONSE_CACHE_TTL", 7 * 86400)),
+        policy=os.environ.get("RESPONSE_CACHE_POLICY", "lfu"),
+    )
@@ -0,0 +1,105 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import histogram
+
+
+class SchedulerBusy(Exception):
+    pass
+
+
+def prompt_priority(prompt, short_words=12):
+    # Lower runs first: short questions ahead of long free-form ones, and
+    # among long ones, shorter before longer.
+    words = len(prompt.split())
+    return 0 if words <= short_words else 1 + words // short_words
+
+
+class GenerationScheduler:
+    # Admission control for Ollama: at most `concurrency` generations run at
+    # once, up to `max_queue` more wait in priority order, and anything
+    # beyond that is rejected immediately instead of slowing everyone down.
+
+    def __init__(self, concurrency=2, max_queue=32, queue_timeout=60.0):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = []
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_depth = 0
+        self.wait_seconds = histogram("llm_queue_wait_seconds")
+
+    def saturated(self):
+        return self.active >= self.concurrency and len(self.waiting) >= self.max_queue
+
+    def _admit(self, priority):
+        with self.lock:
+            if self.active < self.concurrency and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                self.wait_seconds.record(0.0)
+                return
+            if len(self.waiting) >= self.max_queue:
+                self.rejected += 1
+                raise SchedulerBusy("generation queue is full")
+            ticket = [priority, next(self.sequence), threading.Event()]
+            heapq.heappush(self.waiting, ticket)
+            self.max_depth = max(self.max_depth, len(self.waiting))
+
+        started = time.monotonic()
+        if not ticket[2].wait(self.queue_timeout):
+            with self.lock:
+                if not ticket[2].is_set():
+                    self.waiting.remove(ticket)
+                    heapq.heapify(self.waiting)
+                    self.timed_out += 1
+                    raise SchedulerBusy("timed out waiting for a generation slot")
+        # The slot was handed over (and counted as active) by _release
+        self.wait_seconds.record(time.monotonic() - started)
+
+    def _release(self):
+        with self.lock:
+            if self.waiting:
+                ticket = heapq.heappop(self.waiting)
+                self.admitted += 1
+                ticket[2].set()
+            else:
+                self.active -= 1
+
+    @contextmanager
+    def slot(self, prompt):
+        self._admit(prompt_priority(prompt))
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "concurrency": self.concurrency,
+                "active": self.active,
+                "queue_depth": len(self.waiting),
+                "max_queue_depth": self.max_depth,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "wait_seconds": self.wait_seconds.summary(),
+            }
+
+
+def scheduler_from_env():
+    return GenerationScheduler(
+        concurrency=int(os.environ.get("LLM_CONCURRENCY", 2)),
+        max_queue=int(os.environ.get("LLM_MAX_QUEUE", 32)),
+        queue_timeout=float(os.environ.get("LLM_QUEUE_TIMEOUT", 60)),
+    )
@@ -13,6 +13,44 @@ document.addEventListener("DOMContentLoaded", function () {
       div.textContent = `${sender}: ${message}`;
       chatBox.appendChild(div);
       chatBox.scrollTop = chatBox.scrollHeight;
+      return div;
+  }
+
+  // Reads the /chat/stream Server-Sent Events and grows one message as tokens arrive
+  async function streamResponse(body) {
+      const response = await fetch("http://127.0.0.1:5000/chat/stream", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify(body)
+      });
+      // A busy server answers 429 up front with the localized text as JSON
+      if (!response.ok) {
+          const data = await response.json().catch(() => ({}));
+          if (!data.response) throw new Error(`HTTP ${response.status}`);
+          appendMessage("Bot", data.response);
+          return;
+      }
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      const div = appendMessage("Bot", "");
+      let buffer = "";
+      let text = "";
+
+      while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          const events = buffer.split("\n\n");
+          buffer = events.pop();
+          for (const event of events) {
+              const dataLine = event.split("\n").find(line => line.startsWith("data: "));
+              if (!dataLine) continue;
+              const data = JSON.parse(dataLine.slice(6));
+              text = data.token !== undefined ? text + data.token : data.response;
+              div.textContent = `Bot: ${text}`;
+              chatBox.scrollTop = chatBox.scrollHeight;
+          }
+      }
   }
 
   function fetchResponse(message) {
@@ -22,22 +60,69 @@ document.addEventListener("DOMContentLoaded", function () {
               longitude: position.coords.longitude
           };
 
-          fetch("http://127.0.0.1:5000/chat", {
-              method: "POST",
-              headers: { "Content-Type": "application/json" },
-              body: JSON.stringify({ message, language: lang, location })
-          })
-          .then(response => response.json())
-          .then(data => appendMessage("Bot", data.response))
+          streamResponse({ message, language: lang, location })
           .catch(() => appendMessage("Bot", "Error fetching response."));
       });
   }
 
+  // Persistent chat over /chat/ws: the location is sent once per
+  // connection, and the session id lets a reconnect pick up the history.
+  // Falls back to /chat/stream whenever the socket is not open.
+  let socket = null;
+  let socketReady = false;
+  let botDiv = null;
+  let botText = "";
+
+  function connectSocket() {
+      socket = new WebSocket("ws://127.0.0.1:5000/chat/ws");
+      socket.addEventListener("open", () => {
+          const hello = { type: "hello", session: sessionStorage.getItem("chatSession"), language: lang };
+          navigator.geolocation.getCurrentPosition(
+              position => {
+                  hello.location = { latitude: position.coords.latitude, longitude: position.coords.longitude };
+                  socket.send(JSON.stringify(hello));
+              },
+              () => socket.send(JSON.stringify(hello))
+          );
+      });
+      socket.addEventListener("message", event => {
+          const data = JSON.parse(event.data);
+          if (data.type === "session") {
+              sessionStorage.setItem("chatSession", data.session);
+              socketReady = true;
+              return;
+          }
+          if (!botDiv) botDiv = appendMessage("Bot", "");
+          botText = data.type === "token" ? botText + data.token : data.response;
+          botDiv.textContent = `Bot: ${botText}`;
+          chatBox.scrollTop = chatBox.scrollHeight;
+          if (data.type !== "token") {
+              botDiv = null;
+              botText = "";
+          }
+      });
+      socket.addEventListener("close", () => {
+          socket = null;
+          socketReady = false;
+      });
+  }
+
+  function sendMessage(message) {
+      if (socketReady) {
+          socket.send(JSON.stringify({ type: "message", message, language: lang }));
+      } else {
+          fetchResponse(message);
+          if (!socket) connectSocket();
+      }
+  }
+
+  connectSocket();
+
   sendBtn.addEventListener("click", function () {
       const message = userInput.value.trim();
       if (message) {
           appendMessage("You", message);
-          fetchResponse(message);
+          sendMessage(message);
           userInput.value = "";
       }
   });
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+import ollama
+
+from textnorm import normalize_prompt
+
+
+class OllamaEmbedder:
+    # Sentence embeddings from a small local embedding model served by the
+    # same Ollama instance (all-minilm is ~23M parameters and CPU friendly).
+
+    def __init__(self, model="all-minilm"):
+        self.model = model
+
+    def __call__(self, text):
+        response = ollama.embed(model=self.model, input=text)
+        vector = np.asarray(response["embeddings"][0], dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+
+class HashingEmbedder:
+    # Dependency-free fallback: hashed character n-grams, L2 normalized.
+    # Catches re-orderings and small spelling changes, not true synonyms.
+
+    def __init__(self, dim=1024, ngrams=(3, 4, 5)):
+        self.dim = dim
+        self.ngrams = ngrams
+
+    def __call__(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in normalize_prompt(text).split():
+            padded = f" {word} "
+            for n in self.ngrams:
+                for start in range(max(1, len(padded) - n + 1)):
+                    digest = hashlib.blake2b(padded[start:start + n].encode("utf-8"), digest_size=8).digest()
+                    bucket = int.from_bytes(digest, "little")
+                    vector[bucket % self.dim] += 1.0 if bucket >> 63 else -1.0
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+
+class VectorPartition:
+    # Fixed-capacity matrix of unit vectors; a lookup is one mat-vec product.
+    # When full, the least recently used slot is overwritten.
+
+    def __init__(self, dim, capacity):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.answers = [None] * capacity
+        self.last_used = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+
+    def search(self, vector):
+        if not self.size:
+            return None, 0.0
+        scores = self.vectors[:self.size] @ vector
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def add(self, vector, answer):
+        if self.size < len(self.answers):
+            slot = self.size
+            self.size += 1
+        else:
+            slot = int(np.argmin(self.last_used))
+        self.vectors[slot] = vector
+        self.answers[slot] = answer
+        self.last_used[slot] = time.monotonic()
+
+
+class SemanticCache:
+    def __init__(self, embedder, threshold=0.9, capacity=5000):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.capacity = capacity
+        self.partitions = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def embed(self, prompt):
+        try:
+            return self.embedder(prompt)
+        except Exception:
+            self.errors += 1
+            return None
+
+    def get(self, prompt, lang, model):
+        # Returns (match, vector): match is (answer, similarity) for the
+        # closest earlier question in the same language/model partition, or
+        # None below the threshold. On a miss, hand the vector to add() so
+        # the prompt is not embedded a second time.
+        vector = self.embed(prompt)
+        with self.lock:
+            partition = self.partitions.get((lang, model))
+            if vector is None or partition is None:
+                self.misses += 1
+                return None, vector
+            slot, score = partition.search(vector)
+            if slot is None or score < self.threshold:
+                self.misses += 1
+                return None, vector
+            partition.last_used[slot] = time.monotonic()
+            self.hits += 1
+            return (partition.answers[slot], score), vector
+
+    def add(self, prompt, lang, model, answer, vector=None):
+        if vector is None:
+            vector = self.embed(prompt)
+        if vector is None:
+            return
+        with self.lock:
+            partition = self.partitions.get((lang, model))
+            if partition is None:
+                partition = self.partitions[(lang, model)] = VectorPartition(len(vector), self.capacity)
+            partition.add(vector, answer)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "embed_errors": self.errors,
+            "threshold": self.threshold,
+            "entries": {f"{lang}/{model}": partition.size for (lang, model), partition in self.partitions.items()},
+        }
+
+
+def semantic_cache_from_env():
+    if os.environ.get("SEMANTIC_CACHE", "1") != "1":
+        return None
+    if os.environ.get("SEMANTIC_EMBEDDER", "ollama") == "hashing":
+        embedder = HashingEmbedder()
+    else:
+        embedder = OllamaEmbedder(os.environ.get("SEMANTIC_EMBED_MODEL", "all-minilm"))
+    return SemanticCache(
+        embedder,
+        threshold=float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", 0.9)),
+        capacity=int(os.environ.get("SEMANTIC_CACHE_CAPACITY", 5000)),
+    )
@@ -0,0 +1,138 @@
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+def estimate_tokens(text):
+    # About four bytes of UTF-8 per token: close for English, and on the
+    # generous side for Tamil (three bytes per letter), which keeps the
+    # history safely inside the budget.
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+class ChatSession:
+    def __init__(self, session_id, lang="en"):
+        self.id = session_id
+        self.lang = lang
+        self.location = None
+        self.place = None
+        self.weather = None  # (lang, report, fetched at)
+        self.history = deque()
+        self.history_tokens = 0
+        self.last_seen = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_location(self, location):
+        # A new position invalidates everything derived from the old one
+        self.location = location
+        self.place = None
+        self.weather = None
+
+    def add_turn(self, role, content, budget):
+        self.history.append((role, content, estimate_tokens(content)))
+        self.history_tokens += self.history[-1][2]
+        # Oldest turns go first; the newest one is always kept
+        while self.history_tokens > budget and len(self.history) > 1:
+            self.history_tokens -= self.history.popleft()[2]
+
+    def messages(self):
+        return [{"role": role, "content": content} for role, content, _ in self.history]
+
+    def size(self):
+        # Rough bytes held by this session, for the store's memory bound
+        return 512 + sum(len(content.encode("utf-8")) for _, content, _ in self.history)
+
+
+class SessionStore:
+    # WebSocket chat sessions kept in memory, least recently used first.
+    # Sessions idle for longer than `idle_timeout` are dropped, and the
+    # oldest are evicted whenever there are more than `max_sessions` or their
+    # histories together exceed `max_bytes`.
+
+    def __init__(self, max_sessions=10000, max_bytes=64 * 1024 * 1024, idle_timeout=1800, history_tokens=1024):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self.history_tokens = history_tokens
+        self.sessions = OrderedDict()
+        self.bytes = 0
+        self.sizes = {}
+        self.lock = threading.Lock()
+        self.created = 0
+        self.resumed = 0
+        self.idle_evictions = 0
+        self.memory_evictions = 0
+
+    def open(self, session_id=None, lang="en"):
+        # Resumes `session_id` if it is still held, otherwise starts a new one
+        with self.lock:
+            self._evict_idle()
+            session = self.sessions.get(session_id) if session_id else None
+            if session is not None:
+                self.sessions.move_to_end(session_id)
+                self.resumed += 1
+            else:
+                session = ChatSession(secrets.token_urlsafe(16), lang)
+                self.sessions[session.id] = session
+                self.sizes[session.id] = session.size()
+                self.bytes += self.sizes[session.id]
+                self.created += 1
+                self._evict_over_budget()
+            session.last_seen = time.monotonic()
+            return session
+
+    def add_turn(self, session, role, content):
+        with session.lock:
+            session.add_turn(role, content, self.history_tokens)
+            size = session.size()
+        with self.lock:
+            session.last_seen = time.monotonic()
+            if session.id in self.sessions:
+                self.sessions.move_to_end(session.id)
+                self.bytes += size - self.sizes[session.id]
+                self.sizes[session.id] = size
+                self._evict_over_budget()
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if oldest.last_seen > cutoff:
+                break
+            self._drop(oldest.id)
+            self.idle_evictions += 1
+
+    def _evict_over_budget(self):
+        while len(self.sessions) > 1 and (len(self.sessions) > self.max_sessions or self.bytes > self.max_bytes):
+            self._drop(next(iter(self.sessions)))
+            self.memory_evictions += 1
+
+    def _drop(self, session_id):
+        self.sessions.pop(session_id)
+        self.bytes -= self.sizes.pop(session_id)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def stats(self):
+        with self.lock:
+            self._evict_idle()
+            return {
+                "sessions": len(self.sessions),
+                "bytes": self.bytes,
+                "created": self.created,
+                "resumed": self.resumed,
+                "idle_evictions": self.idle_evictions,
+                "memory_evictions": self.memory_evictions,
+            }
+
+
+def session_store_from_env():
+    return SessionStore(
+        max_sessions=int(os.environ.get("CHAT_SESSIONS_MAX", 10000)),
+        max_bytes=int(os.environ.get("CHAT_SESSIONS_MAX_BYTES", 64 * 1024 * 1024)),
+        idle_timeout=float(os.environ.get("CHAT_SESSION_IDLE", 1800)),
+        history_tokens=int(os.environ.get("CHAT_HISTORY_TOKENS", 1024)),
+    )
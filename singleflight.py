@@ -0,0 +1,201 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process layer is available
+    fcntl = None
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution: the first
+    # caller runs fn, the rest block on its Future and get the same result
+    # (or exception).
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            pending = self.calls.get(key)
+            leader = pending is None
+            if leader:
+                pending = self.calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.followers += 1
+        if not leader:
+            return pending.result()
+
+        try:
+            pending.set_result(fn())
+        except BaseException as e:
+            pending.set_exception(e)
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+        return pending.result()
+
+    def stats(self):
+        return {"leaders": self.leaders, "followers": self.followers, "in_flight": len(self.calls)}
+
+
+class SharedStream:
+    # Buffers a token iterator so any number of readers can replay it from
+    # the start while it is still being produced.
+
+    def __init__(self):
+        self.tokens = []
+        self.finished = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def pump(self, source):
+        try:
+            for token in source:
+                with self.condition:
+                    self.tokens.append(token)
+                    self.condition.notify_all()
+        except BaseException as e:
+            self.error = e
+        finally:
+            with self.condition:
+                self.finished = True
+                self.condition.notify_all()
+
+    def __iter__(self):
+        position = 0
+        while True:
+            with self.condition:
+                while position >= len(self.tokens) and not self.finished:
+                    self.condition.wait()
+                if position < len(self.tokens):
+                    token = self.tokens[position]
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            position += 1
+            yield token
+
+
+class StreamFlight:
+    # Single-flight for streamed generations. The generation is pumped on a
+    # background thread, so it finishes (and gets cached) even if the client
+    # that started it disconnects, and late joiners replay what they missed.
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.streams = {}
+        self.lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def stream(self, key, make_source):
+        with self.lock:
+            shared = self.streams.get(key)
+            if shared is None:
+                shared = self.streams[key] = SharedStream()
+                self.leaders += 1
+                self.executor.submit(self._run, key, shared, make_source)
+            else:
+                self.followers += 1
+        return iter(shared)
+
+    def in_flight(self, key):
+        # Whether a stream() for key would join a running generation
+        with self.lock:
+            return key in self.streams
+
+    def _run(self, key, shared, make_source):
+        try:
+            shared.pump(make_source())
+        finally:
+            with self.lock:
+                self.streams.pop(key, None)
+
+    def stats(self):
+        return {"leaders": self.leaders, "followers": self.followers, "in_flight": len(self.streams)}
+
+
+class ProcessFlight:
+    # Cross-process single-flight for gunicorn workers: an exclusive flock on
+    # a per-key lock file serializes the workers, and whoever gets the lock
+    # second finds the answer already in the shared (sqlite) response cache.
+    # Each key gets its own file, named by its full hash, so unrelated
+    # prompts never wait on each other; the holder deletes the file before
+    # unlocking, which keeps the directory to the generations in flight.
+
+    def __init__(self, lock_dir, timeout=120.0, poll=0.05):
+        os.makedirs(lock_dir, exist_ok=True)
+        self.lock_dir = lock_dir
+        self.timeout = timeout
+        self.poll = poll
+        self.waits = 0
+        self.shared_hits = 0
+
+    def path(self, key):
+        return os.path.join(self.lock_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".lock")
+
+    def acquire(self, path, deadline):
+        # The locked file, or None on timeout. A file locked after its
+        # holder deleted it is stale (the next worker creates a fresh one at
+        # the same path), so the lock only counts while the path still
+        # names the file we hold.
+        waited = False
+        while True:
+            lock_file = open(path, "a+")
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        lock_file.close()
+                        return None
+                    waited = True
+                    time.sleep(self.poll)
+            try:
+                current = os.stat(path).st_ino == os.fstat(lock_file.fileno()).st_ino
+            except FileNotFoundError:
+                current = False
+            if current:
+                self.waits += waited
+                return lock_file
+            lock_file.close()
+
+    def do(self, key, lookup, compute):
+        path = self.path(key)
+        lock_file = self.acquire(path, time.monotonic() + self.timeout)
+        if lock_file is None:
+            # Give up coordinating rather than failing the request
+            return compute()
+        try:
+            # Another worker may have finished between our cache check
+            # and taking the lock
+            found = lookup()
+            if found is not None:
+                self.shared_hits += 1
+                return found
+            return compute()
+        finally:
+            os.unlink(path)
+            lock_file.close()
+
+    def stats(self):
+        return {"waits": self.waits, "shared_hits": self.shared_hits}
+
+
+def process_flight_from_env(timeout):
+    # Only worth a lock file when there are other workers to coordinate with;
+    # gunicorn takes its default worker count from WEB_CONCURRENCY
+    lock_dir = os.environ.get("SINGLEFLIGHT_LOCK_DIR", "singleflight_locks")
+    if fcntl is None or not lock_dir or int(os.environ.get("WEB_CONCURRENCY", 1)) <= 1:
+        return None
+    return ProcessFlight(lock_dir, timeout=timeout)
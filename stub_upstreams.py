@@ -0,0 +1,183 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-ins for Nominatim, wttr.in, agmarknet and Ollama, used by the
+# benchmarks so app.py can be exercised without touching the real services.
+# Latencies are in seconds; "ollama_models" optionally overrides the Ollama
+# latency per model name (e.g. a small quantized tier answering faster).
+DEFAULT_LATENCY = {"nominatim": 0.15, "wttr": 0.2, "agmarknet": 0.4, "ollama": 0.8, "ollama_embed": 0.02}
+
+AGMARKNET_HTML = """<html><body><table>
+<tr><th>Commodity</th><th>Modal Price</th></tr>
+<tr><td>Paddy</td><td>2183</td></tr>
+<tr><td>Tomato</td><td>1450</td></tr>
+<tr><td>Banana</td><td>2600</td></tr>
+<tr><td>Groundnut</td><td>6377</td></tr>
+</table></body></html>"""
+
+
+STUB_REPLY = "Apply nitrogen in three split doses."
+
+embedders = []
+
+
+def embed(text):
+    # Imported on first use: semantic_cache imports ollama, whose default
+    # client reads OLLAMA_HOST at import time, before callers point it here
+    if not embedders:
+        from semantic_cache import HashingEmbedder
+        embedders.append(HashingEmbedder(dim=384))
+    return embedders[0](text).tolist()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = DEFAULT_LATENCY
+    # Per-upstream lognormal sigma applied to the latency (0 = fixed), and
+    # the probability that a request fails with a 503
+    jitter = {}
+    error_rate = {}
+    # When set, the streaming fake Ollama waits `latency` before the first
+    # token (prompt evaluation) and then emits token_rate tokens per second
+    token_rate = None
+    reply_words = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def model_latency(self, payload):
+        return self.latency.get("ollama_models", {}).get(payload.get("model"), self.latency["ollama"])
+
+    def delay(self, upstream, seconds=None):
+        seconds = self.latency[upstream] if seconds is None else seconds
+        sigma = self.jitter.get(upstream, 0)
+        if sigma:
+            seconds *= random.lognormvariate(0, sigma)
+        time.sleep(seconds)
+
+    def failed(self, upstream):
+        if random.random() < self.error_rate.get(upstream, 0):
+            self.send_error(503)
+            return True
+        return False
+
+    def reply_text(self):
+        if not self.reply_words:
+            return STUB_REPLY
+        words = STUB_REPLY.split(" ")
+        return " ".join(words[i % len(words)] for i in range(self.reply_words))
+
+    def send_body(self, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/nominatim/reverse"):
+            self.delay("nominatim")
+            if not self.failed("nominatim"):
+                self.send_body(json.dumps({"display_name": "Thanjavur, Tamil Nadu, India"}), "application/json")
+        elif self.path.startswith("/wttr/"):
+            self.delay("wttr")
+            if not self.failed("wttr"):
+                self.send_body("Partly cloudy +31°C\n", "text/plain; charset=utf-8")
+        elif self.path.startswith("/agmarknet"):
+            self.delay("agmarknet")
+            if not self.failed("agmarknet"):
+                self.send_body(AGMARKNET_HTML, "text/html; charset=utf-8")
+        else:
+            self.send_error(404)
+
+    def stream_chat(self, payload):
+        # Ollama's streaming format: one JSON object per line, last has done=true.
+        # Without a token rate the latency is spread evenly across the tokens.
+        tokens = self.reply_text().split(" ")
+        if self.token_rate:
+            self.delay("ollama", self.model_latency(payload))
+        if self.failed("ollama"):
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for index, token in enumerate(tokens + [""]):
+            if self.token_rate:
+                time.sleep(1 / self.token_rate)
+            else:
+                self.delay("ollama", self.model_latency(payload) / (len(tokens) + 1))
+            chunk = {
+                "model": payload.get("model", "mistral"),
+                "message": {"role": "assistant", "content": token + (" " if index < len(tokens) - 1 else "")},
+                "done": index == len(tokens),
+            }
+            line = (json.dumps(chunk) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/api/chat" and payload.get("stream"):
+            self.stream_chat(payload)
+        elif self.path == "/api/chat":
+            reply = self.reply_text()
+            if self.token_rate:
+                self.delay("ollama", self.model_latency(payload) + len(reply.split(" ")) / self.token_rate)
+            else:
+                self.delay("ollama", self.model_latency(payload))
+            if self.failed("ollama"):
+                return
+            body = {
+                "model": payload.get("model", "mistral"),
+                "message": {"role": "assistant", "content": reply},
+                "done": True,
+            }
+            self.send_body(json.dumps(body), "application/json")
+        elif self.path == "/api/embed":
+            self.delay("ollama_embed")
+            if self.failed("ollama_embed"):
+                return
+            inputs = payload.get("input", "")
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            body = {"model": payload.get("model"), "embeddings": [embed(text) for text in inputs]}
+            self.send_body(json.dumps(body), "application/json")
+        else:
+            self.send_error(404)
+
+
+def start_stub_server(latency=None, host="127.0.0.1", port=0, jitter=None, error_rate=None, token_rate=None,
+                      reply_words=None):
+    handler = type("ConfiguredStubHandler", (StubHandler,), {
+        "latency": {**DEFAULT_LATENCY, **(latency or {})},
+        "jitter": jitter or {},
+        "error_rate": error_rate or {},
+        "token_rate": token_rate,
+        "reply_words": reply_words,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_environment(server):
+    # Environment variables that point app.py (and the ollama client) at the stubs
+    base = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    return {
+        "NOMINATIM_URL": f"{base}/nominatim",
+        "WTTR_URL": f"{base}/wttr",
+        "AGMARKNET_URL": f"{base}/agmarknet/",
+        "OLLAMA_HOST": base,
+    }
+
+
+if __name__ == "__main__":
+    server = start_stub_server(port=8765)
+    for name, value in stub_environment(server).items():
+        print(f"export {name}={value}")
+    threading.Event().wait()
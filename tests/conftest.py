@@ -0,0 +1,39 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+# The modules under test live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_upstreams import start_stub_server, stub_environment  # noqa: E402
+
+STALL = 3.0
+DEADLINE = 0.5
+
+
+@pytest.fixture(scope="session")
+def client(tmp_path_factory):
+    # app.py reads its settings at import, so it is imported once per test
+    # run, against stubs whose weather and LLM upstreams stall well past
+    # the deadlines
+    workdir = tmp_path_factory.mktemp("chat")
+    server = start_stub_server(latency={"wttr": STALL, "ollama": STALL})
+    saved = dict(os.environ)
+    os.environ.update({
+        **stub_environment(server),
+        "LLM_DEADLINE": str(DEADLINE),
+        "WEATHER_DEADLINE": str(DEADLINE),
+        "SEMANTIC_CACHE": "0",
+        "GEOCODE_CACHE_PATH": str(workdir / "geocode.sqlite3"),
+        "RESPONSE_CACHE_PATH": str(workdir / "responses.sqlite3"),
+        "SINGLEFLIGHT_LOCK_DIR": str(workdir / "locks"),
+    })
+    try:
+        app = importlib.import_module("app")
+        yield app.app.test_client()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+        server.shutdown()
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+
+@pytest.mark.parametrize("payload", [
+    {"messages": [5]},
+    {"messages": ["hello", None]},
+    {"messages": "hello"},
+    {"messages": [{"message": "weather today", "location": {"latitude": "x", "longitude": 79.1}}]},
+    {"messages": ["weather today"], "location": {"latitude": 10.8}},
+    {"messages": ["weather today"], "location": [10.8, 79.1]},
+])
+def test_malformed_batches_are_rejected_up_front(client, payload):
+    response = client.post("/chat/batch", json=payload)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def batch_answers(client, messages):
+    response = client.post("/chat/batch", json={"messages": messages})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return [line for line in lines if "index" in line]
+
+
+def test_unknown_language_falls_back_to_english(client):
+    french, = batch_answers(client, [{"message": "pm kisan scheme", "language": "fr"}])
+    english, = batch_answers(client, [{"message": "pm kisan scheme", "language": "en"}])
+    assert french["status"] == "ok"
+    assert french["response"] == english["response"]
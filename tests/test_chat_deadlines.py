@@ -0,0 +1,25 @@
+import time
+
+from conftest import DEADLINE
+
+THANJAVUR = {"latitude": 10.787, "longitude": 79.1378}
+
+
+def timed_chat(client, payload):
+    started = time.perf_counter()
+    response = client.post("/chat", json=payload)
+    return response, time.perf_counter() - started
+
+
+def test_stalled_llm_returns_within_deadline(client):
+    response, elapsed = timed_chat(client, {"message": "write a short poem about the monsoon sky", "language": "en"})
+    assert response.status_code == 200
+    assert "taking too long" in response.get_json()["response"]
+    assert elapsed < DEADLINE + 1.0
+
+
+def test_stalled_weather_returns_within_deadline(client):
+    response, elapsed = timed_chat(client, {"message": "weather today", "language": "en", "location": THANJAVUR})
+    assert response.status_code == 200
+    assert "taking too long" in response.get_json()["response"]
+    assert elapsed < DEADLINE + 1.0
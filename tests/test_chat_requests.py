@@ -0,0 +1,22 @@
+import pytest
+
+
+def post_text(client, path, payload):
+    # Streamed responses are closed before the next request reuses the client
+    with client.post(path, json=payload) as response:
+        return response.status_code, response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+def test_unknown_language_falls_back_to_english(client, path):
+    status, hindi = post_text(client, path, {"message": "pm kisan scheme", "language": "hi"})
+    assert status == 200
+    assert hindi == post_text(client, path, {"message": "pm kisan scheme", "language": "en"})[1]
+
+
+@pytest.mark.parametrize("path", ["/chat", "/chat/stream"])
+@pytest.mark.parametrize("location", ["Thanjavur", {"lat": 1}, {"latitude": "x", "longitude": 79.1}])
+def test_malformed_location_is_rejected_up_front(client, path, location):
+    status, body = post_text(client, path, {"message": "how do i grow paddy", "location": location})
+    assert status == 400
+    assert "error" in body
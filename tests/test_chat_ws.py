@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+
+class Closed(Exception):
+    pass
+
+
+class FakeSocket:
+    # Hands chat_ws the given frames, then ends the connection
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.sent = []
+
+    def receive(self):
+        if not self.frames:
+            raise Closed
+        return self.frames.pop(0)
+
+    def send(self, data):
+        self.sent.append(json.loads(data))
+
+
+@pytest.mark.parametrize("frame", [
+    "[1, 2]",
+    "5",
+    '"hello"',
+    "not json",
+    '{"type": "hello", "location": {"latitude": "x", "longitude": 79.1}}',
+    '{"type": "hello", "location": "Thanjavur"}',
+])
+def test_malformed_frames_get_an_error_frame(client, frame):
+    # flask_sock registers a wrapper that builds the real socket
+    chat_ws = client.application.view_functions["chat_ws"].__wrapped__
+    ws = FakeSocket([frame, '{"type": "hello", "language": "fr", "session": [1]}'])
+    with pytest.raises(Closed):
+        chat_ws(ws)
+    assert ws.sent[0] == {"type": "error", "response": "invalid message"}
+    assert ws.sent[1]["type"] == "session"
@@ -0,0 +1,25 @@
+from market_index import find_column, parse_price_tables
+
+# Layout of agmarknet's daily price report
+AGMARKNET_TABLE = """<table>
+<tr><th>Sl no.</th><th>District Name</th><th>Market Name</th><th>Commodity</th><th>Variety</th><th>Grade</th>
+<th>Min Price (Rs./Quintal)</th><th>Max Price (Rs./Quintal)</th><th>Modal Price (Rs./Quintal)</th>
+<th>Price Date</th></tr>
+<tr><td>1</td><td>Thanjavur</td><td>Thanjavur</td><td>Paddy(Dhan)(Common)</td><td>Common</td><td>FAQ</td>
+<td>1900</td><td>2300</td><td>2100</td><td>14 Oct 2026</td></tr>
+<tr><td>2</td><td>Madurai</td><td>Madurai</td><td>Tomato</td><td>Local</td><td>FAQ</td>
+<td>1000</td><td>1800</td><td>1450</td><td>15 Oct 2026</td></tr>
+</table>"""
+
+
+def test_find_column_prefers_earlier_names_over_earlier_headers():
+    headers = ["commodity", "min price", "max price", "modal price"]
+    assert find_column(headers, "modal price", "price") == 3
+    assert find_column(["commodity", "price"], "modal price", "price") == 1
+    assert find_column(headers, "date") is None
+
+
+def test_agmarknet_rows_use_modal_price():
+    prices = parse_price_tables(AGMARKNET_TABLE)
+    assert prices["paddy(dhan)(common)"]["Thanjavur"][:2] == ("Paddy(Dhan)(Common)", "2100")
+    assert prices["tomato"]["Madurai"][:2] == ("Tomato", "1450")
@@ -0,0 +1,11 @@
+from offline_geocoder import OfflineGeocoder
+
+
+def test_only_close_matches_resolve_offline():
+    geocoder = OfflineGeocoder()
+    # Thanjavur town centre
+    assert geocoder.lookup(10.787, 79.1378) == "Thanjavur, Tamil Nadu, India"
+    # Valangaiman, Tiruvarur district: ~8 km from Kumbakonam, the nearest row
+    assert geocoder.lookup(10.8897, 79.3944) is None
+    # ~20 km out to sea off Chennai
+    assert geocoder.lookup(13.0827, 80.47) is None
@@ -0,0 +1,51 @@
+import os
+import threading
+import time
+
+import pytest
+
+from singleflight import ProcessFlight, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="needs flock")
+
+
+def test_unrelated_keys_do_not_wait_on_each_other(tmp_path):
+    # flock conflicts between separate opens even within one process, so
+    # threads stand in for workers
+    flight = ProcessFlight(str(tmp_path))
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(1.0)
+        return "slow"
+
+    worker = threading.Thread(target=flight.do, args=("first prompt", lambda: None, slow))
+    worker.start()
+    started.wait()
+    began = time.perf_counter()
+    assert flight.do("second prompt", lambda: None, lambda: "fast") == "fast"
+    assert time.perf_counter() - began < 0.5
+    worker.join()
+    assert flight.waits == 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_same_key_waits_and_reads_the_shared_answer(tmp_path):
+    flight = ProcessFlight(str(tmp_path))
+    cache = {}
+    started = threading.Event()
+
+    def generate():
+        started.set()
+        time.sleep(0.3)
+        cache["answer"] = "generated"
+        return "generated"
+
+    worker = threading.Thread(target=flight.do, args=("prompt", lambda: cache.get("answer"), generate))
+    worker.start()
+    started.wait()
+    assert flight.do("prompt", lambda: cache.get("answer"), lambda: "generated twice") == "generated"
+    worker.join()
+    assert (flight.waits, flight.shared_hits) == (1, 1)
+    assert os.listdir(tmp_path) == []
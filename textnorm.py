@@ -0,0 +1,23 @@
+import re
+import unicodedata
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def fold_char(char):
+    category = unicodedata.category(char)
+    # Punctuation and symbols (including the Tamil day/month/rupee signs and
+    # the danda) become spaces. Zero-width joiners from Tamil keyboards are
+    # dropped. Vowel signs and the pulli are combining marks (Mn/Mc) and are
+    # kept, unlike a naive \W strip, which would break Tamil words apart.
+    if category[0] in "PS":
+        return " "
+    if category == "Cf":
+        return ""
+    return char
+
+
+def normalize_prompt(text):
+    # NFC first so composed and decomposed Tamil spell the same key
+    text = unicodedata.normalize("NFC", text).casefold()
+    return WHITESPACE.sub(" ", "".join(fold_char(char) for char in text)).strip()
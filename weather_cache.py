@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class WeatherTileCache:
+    # Weather reports keyed by (grid tile, language). Fresh entries are served
+    # directly; stale ones are served at once while a single background
+    # refresh runs; missing ones are fetched inline, with concurrent callers
+    # for the same tile waiting on the one upstream call. If that fetch fails
+    # (upstream down, circuit open), an expired entry is still better than
+    # nothing and is served instead.
+
+    def __init__(self, fetch, tile_deg=0.1, ttl=900, max_stale=3 * 3600, max_entries=4096):
+        self.fetch = fetch
+        self.tile_deg = tile_deg
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="weather-refresh")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.expired_hits = 0
+        self.refresh_seconds_total = 0.0
+        self.refresh_seconds_max = 0.0
+
+    def tile(self, lat, lon):
+        return round(float(lat) / self.tile_deg), round(float(lon) / self.tile_deg)
+
+    def tile_center(self, tile):
+        return round(tile[0] * self.tile_deg, 4), round(tile[1] * self.tile_deg, 4)
+
+    def get(self, lat, lon, lang):
+        key = (self.tile(lat, lon), lang)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = now - fetched_at
+                if age < self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if age < self.ttl + self.max_stale:
+                    self.entries.move_to_end(key)
+                    self.stale_hits += 1
+                    self._refresh(key)
+                    return value
+            self.misses += 1
+            pending = self._refresh(key)
+        try:
+            return pending.result()
+        except Exception:
+            if entry is None:
+                raise
+            with self.lock:
+                self.expired_hits += 1
+            return entry[0]
+
+    def _refresh(self, key):
+        # Caller holds the lock. Returns the in-flight refresh for this key,
+        # starting one if none is running.
+        pending = self.inflight.get(key)
+        if pending is None:
+            pending = self.refresher.submit(self._load, key)
+            self.inflight[key] = pending
+        return pending
+
+    def _load(self, key):
+        tile, lang = key
+        lat, lon = self.tile_center(tile)
+        started = time.monotonic()
+        try:
+            value = self.fetch(lat, lon, lang)
+        except Exception:
+            with self.lock:
+                self.refresh_errors += 1
+                self.inflight.pop(key, None)
+            raise
+        elapsed = time.monotonic() - started
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.inflight.pop(key, None)
+            self.refreshes += 1
+            self.refresh_seconds_total += elapsed
+            self.refresh_seconds_max = max(self.refresh_seconds_max, elapsed)
+        return value
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "expired_hits": self.expired_hits,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                "entries": len(self.entries),
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "refresh_seconds_avg": round(self.refresh_seconds_total / self.refreshes, 4) if self.refreshes else 0.0,
+                "refresh_seconds_max": round(self.refresh_seconds_max, 4),
+            }
+
+
+def weather_cache_from_env(fetch):
+    return WeatherTileCache(
+        fetch,
+        tile_deg=float(os.environ.get("WEATHER_TILE_DEG", 0.1)),
+        ttl=float(os.environ.get("WEATHER_CACHE_TTL", 900)),
+        max_stale=float(os.environ.get("WEATHER_MAX_STALE", 3 * 3600)),
+    )